@@ -1,27 +1,65 @@
+import os
 import uuid
 import tempfile
-import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, Any
+from typing import Optional
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from src.pipeline.batch import BatchPipeline
+from src.pipeline.workers import WorkerPool, QueueFullError
+from src.storage import JobStore, create_job_store
+from src.utils.config import load_config
 
 app = FastAPI(title="Vox API", version="1.0.0")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-jobs: Dict[str, Dict[str, Any]] = {}
-pipeline: BatchPipeline = None
+CONFIG_PATH = "config.yaml"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
+job_store: Optional[JobStore] = None
+worker_pool: Optional[WorkerPool] = None
 
-def get_pipeline() -> BatchPipeline:
-    global pipeline
-    if pipeline is None:
-        pipeline = BatchPipeline()
-    return pipeline
+
+def get_job_store() -> JobStore:
+    global job_store
+    if job_store is None:
+        job_store = create_job_store((load_config(CONFIG_PATH) or {}).get("jobs", {}))
+        interrupted = job_store.fail_incomplete("Server restarted before the job finished")
+        if interrupted:
+            logger.warning(f"Marked {interrupted} interrupted jobs as failed")
+    return job_store
+
+
+def get_worker_pool() -> WorkerPool:
+    global worker_pool
+    if worker_pool is None:
+        workers_config = (load_config(CONFIG_PATH) or {}).get("workers", {})
+        worker_pool = WorkerPool(
+            num_workers=workers_config.get("count", 2),
+            max_queue_size=workers_config.get("max_queue_size", 16),
+            config_path=CONFIG_PATH,
+            on_progress=update_job_progress,
+        )
+        if workers_config.get("preload", True):
+            worker_pool.warm_up()
+    return worker_pool
+
+
+@app.on_event("startup")
+async def startup():
+    get_job_store()
+    get_worker_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if worker_pool is not None:
+        worker_pool.shutdown(wait=False)
+    if job_store is not None:
+        job_store.close()
 
 
 @app.get("/app", response_class=HTMLResponse)
@@ -40,52 +78,74 @@ async def upload_audio(file: UploadFile = File(...)):
     ext = Path(file.filename).suffix.lower()
     if ext not in allowed:
         raise HTTPException(status_code=400, detail=f"Unsupported format: {ext}")
+    pool = get_worker_pool()
+    if pool.is_full():
+        raise_queue_full(pool.max_queue_size + 1)
+    store = get_job_store()
     job_id = str(uuid.uuid4())
-    jobs[job_id] = {"status": "uploading", "progress": 0, "stage": "Uploading...", "result": None, "error": None}
+    store.create(job_id, status="uploading", progress=0, stage="Uploading...")
     with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-        content = await file.read()
-        tmp.write(content)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            tmp.write(chunk)
         tmp_path = tmp.name
-    jobs[job_id]["status"] = "processing"
-    jobs[job_id]["stage"] = "Starting..."
-    thread = threading.Thread(target=process_audio_job, args=(job_id, tmp_path))
-    thread.start()
-    return JSONResponse({"job_id": job_id, "status": "processing"})
+    store.update(job_id, status="queued", stage="Queued")
+    try:
+        position = pool.submit(job_id, tmp_path, on_done=lambda done_id, future: complete_job(done_id, future, tmp_path))
+    except QueueFullError as e:
+        os.unlink(tmp_path)
+        store.delete(job_id)
+        raise_queue_full(e.queue_position)
+    return JSONResponse({"job_id": job_id, "status": "queued", "queue_position": position})
+
+
+def raise_queue_full(queue_position: int):
+    raise HTTPException(status_code=429, detail={"error": "Job queue is full", "queue_position": queue_position}, headers={"Retry-After": "10"})
+
+
+def update_job_progress(job_id: str, progress: int, stage: str):
+    store = get_job_store()
+    job = store.get(job_id)
+    if job and job["status"] in ("queued", "processing"):
+        store.update(job_id, status="processing", progress=progress, stage=stage)
 
 
-def process_audio_job(job_id: str, audio_path: str):
-    def progress_callback(progress: int, stage: str):
-        jobs[job_id]["progress"] = progress
-        jobs[job_id]["stage"] = stage
+def complete_job(job_id: str, future: Future, audio_path: Optional[str] = None):
+    store = get_job_store()
+    if audio_path:
+        try:
+            os.unlink(audio_path)
+        except OSError:
+            pass
     try:
-        pipe = get_pipeline()
-        result = pipe.process(audio_path, progress_callback=progress_callback)
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["stage"] = "Complete"
-        jobs[job_id]["result"] = result
+        result = future.result()
+        store.set_result(job_id, result)
+        store.update(job_id, status="completed", progress=100, stage="Complete")
     except Exception as e:
         logger.error(f"Job {job_id} failed: {e}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
+        store.update(job_id, status="failed", error=str(e))
 
 
 @app.get("/api/status/{job_id}")
 async def get_status(job_id: str):
-    if job_id not in jobs:
+    job = get_job_store().get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    job = jobs[job_id]
-    return JSONResponse({"job_id": job_id, "status": job["status"], "progress": job["progress"], "stage": job["stage"], "error": job.get("error")})
+    queue_position = worker_pool.queue_position(job_id) if worker_pool else None
+    return JSONResponse({"job_id": job_id, "status": job["status"], "progress": job["progress"], "stage": job["stage"], "queue_position": queue_position, "error": job.get("error")})
 
 
 @app.get("/api/result/{job_id}")
 async def get_result(job_id: str):
-    if job_id not in jobs:
+    store = get_job_store()
+    job = store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    job = jobs[job_id]
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail=f"Job not completed: {job['status']}")
-    return JSONResponse(job["result"])
+    result = store.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job result expired")
+    return JSONResponse(result)
 
 
 @app.get("/health")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import glob
 import json
 import sys
 from pathlib import Path
@@ -9,26 +10,51 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.pipeline.batch import BatchPipeline
 from src.utils.logger import setup_logger
 
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".ogg", ".flac", ".m4a", ".webm"}
+
+
+def collect_inputs(audio_input: str) -> list:
+    input_path = Path(audio_input)
+    if input_path.is_dir():
+        return sorted(str(p) for p in input_path.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)
+    if glob.has_magic(audio_input):
+        return sorted(p for p in glob.glob(audio_input, recursive=True) if Path(p).suffix.lower() in AUDIO_EXTENSIONS)
+    return [str(input_path)] if input_path.exists() else []
+
 
 def main():
     parser = argparse.ArgumentParser(description="Process audio file with Vox pipeline")
-    parser.add_argument("audio_file", help="Path to audio file")
-    parser.add_argument("-o", "--output", help="Output JSON path")
+    parser.add_argument("audio_file", help="Path to audio file, directory or glob pattern")
+    parser.add_argument("-o", "--output", help="Output JSON path (single file) or directory (directory/glob input)")
     parser.add_argument("-c", "--config", default="config.yaml", help="Config file path")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
     args = parser.parse_args()
     setup_logger(log_level="DEBUG" if args.verbose else "INFO")
     audio_path = Path(args.audio_file)
-    if not audio_path.exists():
-        print(f"Error: File not found: {audio_path}")
+    inputs = collect_inputs(args.audio_file)
+    if not inputs:
+        print(f"Error: No audio files found: {args.audio_file}")
         sys.exit(1)
-    output_path = args.output or f"outputs/{audio_path.stem}_output.json"
-    print(f"Processing: {audio_path}")
     pipeline = BatchPipeline(config_path=args.config)
     try:
-        result = pipeline.process(str(audio_path), output_path)
-        print(f"\nSaved to: {output_path}")
-        print(f"\nSummary: {result.get('summary', 'N/A')[:200]}...")
+        if audio_path.is_file():
+            output_path = args.output or f"outputs/{audio_path.stem}_output.json"
+            print(f"Processing: {audio_path}")
+            result = pipeline.process(str(audio_path), output_path)
+            print(f"\nSaved to: {output_path}")
+            print(f"\nSummary: {result.get('summary', 'N/A')[:200]}...")
+            return
+        output_dir = args.output or "outputs"
+        print(f"Processing {len(inputs)} files -> {output_dir}")
+        failed = 0
+        for result in pipeline.process_many(inputs, output_dir=output_dir):
+            source = result["metadata"]["source_file"]
+            if result.get("error"):
+                failed += 1
+                print(f"FAILED {source}: {result['error']}")
+            else:
+                print(f"Done {source} ({result['metadata']['processing_time_seconds']}s)")
+        print(f"\nProcessed {len(inputs) - failed}/{len(inputs)} files")
     finally:
         pipeline.cleanup()
 
@@ -1,4 +1,21 @@
-from src.asr.transcriber import WhisperTranscriber
-from src.asr.refiner import WhisperXRefiner
+import importlib
 
-__all__ = ["WhisperTranscriber", "WhisperXRefiner"]
+_EXPORTS = {
+    "WhisperTranscriber": "src.asr.transcriber",
+    "WhisperXRefiner": "src.asr.refiner",
+    "TranscriptionCache": "src.asr.cache",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+import numpy as np
+from loguru import logger
+
+
+class TranscriptionCache:
+    def __init__(self, cache_dir: str = "cache/asr", max_size_mb: float = 2048):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size_bytes = sum(f.stat().st_size for f in self.cache_dir.glob("*/*.json.gz"))
+
+    @staticmethod
+    def make_key(audio: np.ndarray, settings: Dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable ASR cache entry {key}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            previous_size = path.stat().st_size if path.exists() else 0
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Failed to write ASR cache entry {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._size_bytes += path.stat().st_size - previous_size
+        if self._size_bytes > self.max_size_bytes:
+            self._evict()
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size_bytes -= size
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob("*/*.json.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        with self._lock:
+            self._size_bytes = sum(size for _, size, _ in entries)
+        target = int(self.max_size_bytes * 0.9)
+        removed = 0
+        for _, _, path in entries:
+            if self._size_bytes <= target:
+                break
+            self._remove(path)
+            removed += 1
+        if removed:
+            logger.info(f"ASR cache evicted {removed} entries")
+
+    def clear(self) -> None:
+        for path in self.cache_dir.glob("*/*.json.gz"):
+            self._remove(path)
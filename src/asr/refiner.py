@@ -1,7 +1,11 @@
-from typing import Dict, Optional, Any
-import torch
+import threading
+from typing import Dict, Optional, Any, Tuple, Union
+import numpy as np
 from loguru import logger
 
+from src.utils.cache import LRUCache
+from src.utils.models import model_registry
+
 
 class WhisperXRefiner:
     def __init__(
@@ -10,13 +14,17 @@ class WhisperXRefiner:
         align_model: Optional[str] = None,
         interpolate_method: str = "linear",
         return_char_alignments: bool = False,
+        max_cached_models: int = 3,
+        max_memory_mb: Optional[float] = 2048,
     ):
         self.device = device
         self.align_model = align_model
         self.interpolate_method = interpolate_method
         self.return_char_alignments = return_char_alignments
-        self.alignment_model = None
-        self.metadata = None
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.alignment_models = LRUCache(max_entries=max_cached_models, on_evict=self._release_alignment_model)
+        self._model_bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
         try:
             import whisperx
             self.whisperx = whisperx
@@ -25,25 +33,22 @@ class WhisperXRefiner:
             self.whisperx = None
             self.available = False
 
-    def refine(self, audio_path: str, transcription: Dict[str, Any]) -> Dict[str, Any]:
+    def refine(self, audio: Union[str, np.ndarray], transcription: Dict[str, Any]) -> Dict[str, Any]:
         if not self.available:
             return transcription
         try:
             language = transcription.get("language", "en")
-            if self.alignment_model is None or self.metadata is None:
-                self.alignment_model, self.metadata = self.whisperx.load_align_model(
-                    language_code=language,
-                    device=self.device,
-                )
-            audio = self.whisperx.load_audio(audio_path)
+            alignment_model, metadata = self._alignment_model(language)
+            if not isinstance(audio, np.ndarray):
+                audio = self.whisperx.load_audio(str(audio))
             segments_for_alignment = [
                 {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
                 for seg in transcription["segments"]
             ]
             result = self.whisperx.align(
                 segments_for_alignment,
-                self.alignment_model,
-                self.metadata,
+                alignment_model,
+                metadata,
                 audio,
                 self.device,
                 interpolate_method=self.interpolate_method,
@@ -80,10 +85,35 @@ class WhisperXRefiner:
             logger.error(f"WhisperX refinement failed: {e}")
             return transcription
 
+    def _registry_key(self, language: str) -> tuple:
+        return ("whisperx-align", self.align_model or language, self.device, None)
+
+    def _alignment_model(self, language: str) -> Tuple[Any, Dict[str, Any]]:
+        with self._lock:
+            cached = self.alignment_models.get(language)
+            if cached is not None:
+                return cached
+            entry = model_registry.acquire(
+                self._registry_key(language),
+                lambda: self.whisperx.load_align_model(language_code=language, device=self.device, model_name=self.align_model),
+            )
+            self._model_bytes[language] = self._estimate_bytes(entry[0])
+            self.alignment_models.put(language, entry)
+            while self.max_memory_bytes and len(self.alignment_models) > 1 and sum(self._model_bytes.values()) > self.max_memory_bytes:
+                self.alignment_models.evict_oldest()
+            return entry
+
+    def _release_alignment_model(self, language: str, entry: Tuple[Any, Dict[str, Any]]) -> None:
+        self._model_bytes.pop(language, None)
+        model_registry.release(self._registry_key(language))
+        logger.info(f"Released alignment model for {language}")
+
+    @staticmethod
+    def _estimate_bytes(model: Any) -> int:
+        try:
+            return sum(p.numel() * p.element_size() for p in model.parameters())
+        except Exception:
+            return 0
+
     def cleanup(self) -> None:
-        if self.alignment_model is not None:
-            del self.alignment_model
-            self.alignment_model = None
-            self.metadata = None
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+        self.alignment_models.clear()
@@ -1,10 +1,32 @@
-import gc
-from typing import Dict, List, Optional, Any
-import torch
-from faster_whisper import WhisperModel
+import queue
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Any, Iterable, Iterator, Tuple
+import numpy as np
 from loguru import logger
 
+from src.asr.cache import TranscriptionCache
+from src.utils.audio import AudioInput, load_pcm, stream_pcm
 from src.utils.metrics import metrics
+from src.utils.models import model_registry
+
+if TYPE_CHECKING:
+    from faster_whisper import BatchedInferencePipeline as _BatchedInferencePipeline, WhisperModel as _WhisperModel
+
+SAMPLE_RATE = 16000
+MAX_CLIP_SECONDS = 30
+
+WhisperModel = None
+BatchedInferencePipeline = None
+
+
+def _import_faster_whisper() -> None:
+    global WhisperModel, BatchedInferencePipeline
+    import faster_whisper
+    WhisperModel = WhisperModel or faster_whisper.WhisperModel
+    BatchedInferencePipeline = BatchedInferencePipeline or faster_whisper.BatchedInferencePipeline
 
 
 class WhisperTranscriber:
@@ -17,6 +39,10 @@ class WhisperTranscriber:
         beam_size: int = 5,
         vad_filter: bool = True,
         vad_parameters: Optional[Dict[str, Any]] = None,
+        cache: Optional[TranscriptionCache] = None,
+        num_workers: int = 1,
+        download_root: Optional[str] = None,
+        preload: bool = False,
     ):
         self.model_size = model_size
         self.device = device
@@ -25,49 +51,69 @@ class WhisperTranscriber:
         self.beam_size = beam_size
         self.vad_filter = vad_filter
         self.vad_parameters = vad_parameters or {}
-        self.model: Optional[WhisperModel] = None
-        self._load_model()
+        self.cache = cache
+        self.num_workers = num_workers
+        self.download_root = download_root
+        self._model: Optional["_WhisperModel"] = None
+        self._model_key: Optional[Tuple[str, str, str, str]] = None
+        self.batched_model: Optional["_BatchedInferencePipeline"] = None
+        if preload:
+            model_registry.preload(self._registry_key(), self._load_model)
+
+    def _registry_key(self) -> Tuple[str, str, str, str]:
+        return ("whisper", self.model_size, self.device, self.compute_type)
 
-    def _load_model(self) -> None:
+    @property
+    def model(self) -> "_WhisperModel":
+        if self._model is None:
+            key = self._registry_key()
+            self._model = model_registry.acquire(key, self._load_model)
+            self._model_key = key
+        return self._model
+
+    def _load_model(self) -> "_WhisperModel":
+        _import_faster_whisper()
         try:
             logger.info(f"Loading Whisper model: {self.model_size} on {self.device}")
-            download_root = "D:/task/models/whisper"
-            self.model = WhisperModel(
+            model = WhisperModel(
                 self.model_size,
                 device=self.device,
                 compute_type=self.compute_type,
-                download_root=download_root,
+                download_root=self.download_root,
+                num_workers=self.num_workers,
             )
             logger.success(f"Whisper model loaded: {self.model_size}")
+            return model
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
-            if self.device == "cuda":
-                logger.warning("Fallback to CPU...")
-                self.device = "cpu"
-                self.compute_type = "int8"
-                try:
-                    download_root = "D:/task/models/whisper"
-                    self.model = WhisperModel(
-                        self.model_size,
-                        device=self.device,
-                        compute_type=self.compute_type,
-                        download_root=download_root,
-                    )
-                    logger.success("Whisper model loaded on CPU")
-                except Exception as e2:
-                    logger.critical(f"Failed on CPU: {e2}")
-                    raise
-            else:
+            if self.device != "cuda":
+                raise
+            logger.warning("Fallback to CPU...")
+            try:
+                model = WhisperModel(
+                    self.model_size,
+                    device="cpu",
+                    compute_type="int8",
+                    download_root=self.download_root,
+                    num_workers=self.num_workers,
+                )
+                logger.success("Whisper model loaded on CPU")
+                return model
+            except Exception as e2:
+                logger.critical(f"Failed on CPU: {e2}")
                 raise
 
-    def transcribe(self, audio_path: str, task: str = "transcribe", **kwargs) -> Dict[str, Any]:
-        if self.model is None:
-            raise RuntimeError("Whisper model not loaded")
-        logger.info(f"Transcribing: {audio_path}")
+    def transcribe(self, audio: AudioInput, task: str = "transcribe", **kwargs) -> Dict[str, Any]:
+        logger.info(f"Transcribing: {audio if isinstance(audio, str) else type(audio).__name__}")
         with metrics.asr_latency.time():
             try:
+                audio = load_pcm(audio, sample_rate=SAMPLE_RATE)
+                cache_key = self._cache_key(audio, task, kwargs)
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return cached
                 segments, info = self.model.transcribe(
-                    audio_path,
+                    audio,
                     language=self.language,
                     task=task,
                     beam_size=self.beam_size,
@@ -76,44 +122,14 @@ class WhisperTranscriber:
                     word_timestamps=True,
                     **kwargs
                 )
-                segments_list = list(segments)
-                result = {
-                    "text": "",
-                    "language": info.language,
-                    "language_probability": info.language_probability,
-                    "duration": info.duration,
-                    "segments": [],
-                    "words": [],
-                }
-                full_text_parts = []
-                for segment in segments_list:
-                    segment_data = {
-                        "id": segment.id,
-                        "start": segment.start,
-                        "end": segment.end,
-                        "text": segment.text,
-                        "avg_logprob": segment.avg_logprob,
-                        "no_speech_prob": segment.no_speech_prob,
-                        "confidence": self._logprob_to_confidence(segment.avg_logprob),
-                        "words": [],
-                    }
-                    if segment.words:
-                        for word in segment.words:
-                            word_data = {
-                                "word": word.word,
-                                "start": word.start,
-                                "end": word.end,
-                                "probability": word.probability,
-                                "confidence": word.probability,
-                            }
-                            segment_data["words"].append(word_data)
-                            result["words"].append(word_data)
-                    result["segments"].append(segment_data)
-                    full_text_parts.append(segment.text)
-                result["text"] = " ".join(full_text_parts).strip()
-                metrics.asr_requests.inc()
-                metrics.audio_duration_seconds.observe(info.duration)
-                metrics.transcribed_words.inc(len(result["words"]))
+                result = self._build_result(
+                    [self._segment_to_dict(segment) for segment in segments],
+                    info.language,
+                    info.language_probability,
+                    info.duration,
+                )
+                self._record_metrics(result)
+                self._cache_put(cache_key, result)
                 logger.success(f"Transcription complete: {len(result['words'])} words")
                 return result
             except Exception as e:
@@ -121,6 +137,305 @@ class WhisperTranscriber:
                 logger.error(f"Transcription failed: {e}")
                 raise
 
+    def transcribe_stream(self, audio: AudioInput, block_seconds: float = 30.0, queue_blocks: int = 4, task: str = "transcribe", **kwargs) -> Iterator[Dict[str, Any]]:
+        for segments, _, _ in self._stream_windows(audio, block_seconds, queue_blocks, task, **kwargs):
+            yield from segments
+
+    def transcribe_large(self, audio: AudioInput, block_seconds: float = 30.0, queue_blocks: int = 4, on_segment: Optional[Callable[[Dict[str, Any]], None]] = None, task: str = "transcribe", **kwargs) -> Dict[str, Any]:
+        segment_dicts = []
+        language = self.language
+        duration = 0.0
+        with metrics.asr_latency.time():
+            for segments, language, duration in self._stream_windows(audio, block_seconds, queue_blocks, task, **kwargs):
+                segment_dicts.extend(segments)
+                if on_segment:
+                    for segment in segments:
+                        on_segment(segment)
+        result = self._build_result(segment_dicts, language, 1.0, duration)
+        self._record_metrics(result)
+        return result
+
+    def _stream_windows(self, audio: AudioInput, block_seconds: float, queue_blocks: int, task: str, **kwargs) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str], float]]:
+        blocks: queue.Queue = queue.Queue(maxsize=max(queue_blocks, 1))
+        stop = threading.Event()
+        decoder = threading.Thread(target=self._decode_blocks, args=(audio, block_seconds, blocks, stop), daemon=True)
+        decoder.start()
+        language = self.language
+        carry = np.zeros(0, dtype=np.float32)
+        window_start = 0
+        segment_id = 0
+        try:
+            while True:
+                block = blocks.get()
+                if isinstance(block, Exception):
+                    raise block
+                final = block is None
+                window = carry if final else np.concatenate([carry, block])
+                if len(window) == 0:
+                    break
+                segments, info = self.model.transcribe(
+                    window,
+                    language=language,
+                    task=task,
+                    beam_size=self.beam_size,
+                    vad_filter=self.vad_filter,
+                    vad_parameters=self.vad_parameters,
+                    word_timestamps=True,
+                    **kwargs
+                )
+                segments = list(segments)
+                language = language or info.language
+                cut = len(window)
+                if not final and segments and len(window) - int(segments[-1].start * SAMPLE_RATE) <= len(block):
+                    cut = int(segments[-1].start * SAMPLE_RATE)
+                    segments = segments[:-1]
+                segment_dicts = []
+                for segment in segments:
+                    segment_id += 1
+                    segment_data = self._segment_to_dict(segment, offset=window_start / SAMPLE_RATE)
+                    segment_data["id"] = segment_id
+                    segment_dicts.append(segment_data)
+                yield segment_dicts, language, (window_start + len(window)) / SAMPLE_RATE
+                if final:
+                    break
+                carry = window[cut:].copy()
+                window_start += cut
+        except Exception as e:
+            metrics.asr_errors.inc()
+            logger.error(f"Streaming transcription failed: {e}")
+            raise
+        finally:
+            stop.set()
+
+    @staticmethod
+    def _decode_blocks(audio: AudioInput, block_seconds: float, blocks: queue.Queue, stop: threading.Event) -> None:
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    blocks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for block in stream_pcm(audio, sample_rate=SAMPLE_RATE, block_seconds=block_seconds):
+                if not put(block):
+                    return
+            put(None)
+        except Exception as e:
+            put(e)
+
+    def _cache_key(self, audio: np.ndarray, task: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        settings = {
+            "model_size": self.model_size,
+            "compute_type": self.compute_type,
+            "beam_size": self.beam_size,
+            "language": self.language,
+            "vad_filter": self.vad_filter,
+            "vad_parameters": self.vad_parameters,
+            "task": task,
+            "kwargs": kwargs,
+        }
+        return self.cache.make_key(audio, settings)
+
+    def _cache_get(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        result = self.cache.get(cache_key)
+        if result is None:
+            metrics.asr_cache_misses.inc()
+            return None
+        metrics.asr_cache_hits.inc()
+        logger.info(f"ASR cache hit: {cache_key[:12]}")
+        return result
+
+    def _cache_put(self, cache_key: Optional[str], result: Dict[str, Any]) -> None:
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+
+    def transcribe_many(
+        self,
+        audio_paths: Iterable[str],
+        batch_size: int = 16,
+        max_clips_per_call: int = 64,
+        prefetch: int = 2,
+        task: str = "transcribe",
+        **kwargs
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if self.batched_model is None:
+            _import_faster_whisper()
+            self.batched_model = BatchedInferencePipeline(model=self.model)
+        group = []
+        group_clips = 0
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as pool:
+            for audio_path, audio, error in self._prefetch_audio(pool, audio_paths, prefetch):
+                if error is not None:
+                    metrics.asr_errors.inc()
+                    logger.error(f"Failed to decode {audio_path}: {error}")
+                    yield audio_path, {"error": str(error)}
+                    continue
+                cache_key = self._cache_key(audio, task, kwargs)
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    yield audio_path, cached
+                    continue
+                clips = self._speech_clips(audio)
+                group.append((audio_path, audio, clips, cache_key))
+                group_clips += len(clips)
+                if group_clips >= max_clips_per_call:
+                    yield from self._transcribe_group(group, batch_size, task, **kwargs)
+                    group = []
+                    group_clips = 0
+            if group:
+                yield from self._transcribe_group(group, batch_size, task, **kwargs)
+
+    def transcribe_batch(self, audios: List[np.ndarray], batch_size: int = 16, task: str = "transcribe", **kwargs) -> List[Dict[str, Any]]:
+        if self.batched_model is None:
+            _import_faster_whisper()
+            self.batched_model = BatchedInferencePipeline(model=self.model)
+        max_samples = MAX_CLIP_SECONDS * SAMPLE_RATE
+        group = [(audio, [(start, min(start + max_samples, len(audio))) for start in range(0, len(audio), max_samples)]) for audio in audios]
+        if self.language is None:
+            return [self._transcribe_clips([item], batch_size, task, **kwargs)[0] for item in group]
+        return self._transcribe_clips(group, batch_size, task, **kwargs)
+
+    @staticmethod
+    def _prefetch_audio(pool: ThreadPoolExecutor, audio_paths: Iterable[str], depth: int) -> Iterator[Tuple[str, Optional[np.ndarray], Optional[Exception]]]:
+        pending = deque()
+
+        def resolve(item):
+            audio_path, future = item
+            try:
+                return audio_path, future.result(), None
+            except Exception as e:
+                return audio_path, None, e
+
+        for audio_path in audio_paths:
+            pending.append((str(audio_path), pool.submit(load_pcm, str(audio_path), sample_rate=SAMPLE_RATE)))
+            if len(pending) > depth:
+                yield resolve(pending.popleft())
+        while pending:
+            yield resolve(pending.popleft())
+
+    def _speech_clips(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        max_samples = MAX_CLIP_SECONDS * SAMPLE_RATE
+        if self.vad_filter:
+            vad_parameters = {"min_silence_duration_ms": 160, **self.vad_parameters, "max_speech_duration_s": MAX_CLIP_SECONDS}
+            from faster_whisper.vad import VadOptions, get_speech_timestamps
+            spans = [(ts["start"], ts["end"]) for ts in get_speech_timestamps(audio, VadOptions(**vad_parameters))]
+        else:
+            spans = [(start, min(start + max_samples, len(audio))) for start in range(0, len(audio), max_samples)]
+        return self._merge_spans(spans, max_samples)
+
+    @staticmethod
+    def _merge_spans(spans: List[Tuple[int, int]], max_samples: int) -> List[Tuple[int, int]]:
+        merged = []
+        for start, end in spans:
+            if merged and end - merged[-1][0] <= max_samples:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _transcribe_group(self, group: List[Tuple[str, np.ndarray, List[Tuple[int, int]], Optional[str]]], batch_size: int, task: str, **kwargs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if self.language is None:
+            subgroups = [[item] for item in group]
+        else:
+            subgroups = [group]
+        for subgroup in subgroups:
+            results = self._transcribe_clips([(audio, clips) for _, audio, clips, _ in subgroup], batch_size, task, **kwargs)
+            for (audio_path, _, _, cache_key), result in zip(subgroup, results):
+                self._cache_put(cache_key, result)
+                yield audio_path, result
+
+    def _transcribe_clips(self, group: List[Tuple[np.ndarray, List[Tuple[int, int]]]], batch_size: int, task: str, **kwargs) -> List[Dict[str, Any]]:
+        pieces = []
+        clip_timestamps = []
+        owners = []
+        cursor = 0
+        for index, (audio, clips) in enumerate(group):
+            for start, end in clips:
+                pieces.append(audio[start:end])
+                clip_timestamps.append({"start": cursor / SAMPLE_RATE, "end": (cursor + end - start) / SAMPLE_RATE})
+                owners.append((index, (start - cursor) / SAMPLE_RATE))
+                cursor += end - start
+        per_file: List[List[Dict[str, Any]]] = [[] for _ in group]
+        language = self.language
+        language_probability = 1.0
+        if pieces:
+            logger.info(f"Batched transcription: {len(group)} files, {len(pieces)} clips")
+            with metrics.asr_latency.time():
+                try:
+                    segments, info = self.batched_model.transcribe(
+                        np.concatenate(pieces),
+                        language=self.language,
+                        task=task,
+                        beam_size=self.beam_size,
+                        word_timestamps=True,
+                        clip_timestamps=clip_timestamps,
+                        batch_size=batch_size,
+                        **kwargs
+                    )
+                    clip_starts = [clip["start"] for clip in clip_timestamps]
+                    for segment in segments:
+                        index, offset = owners[max(bisect_right(clip_starts, segment.start) - 1, 0)]
+                        per_file[index].append(self._segment_to_dict(segment, offset))
+                    language = info.language
+                    language_probability = info.language_probability
+                except Exception as e:
+                    metrics.asr_errors.inc()
+                    logger.error(f"Batched transcription failed: {e}")
+                    raise
+        results = []
+        for (audio, _), segment_dicts in zip(group, per_file):
+            for segment_id, segment_data in enumerate(segment_dicts, start=1):
+                segment_data["id"] = segment_id
+            result = self._build_result(segment_dicts, language, language_probability, len(audio) / SAMPLE_RATE)
+            self._record_metrics(result)
+            results.append(result)
+        return results
+
+    def _segment_to_dict(self, segment, offset: float = 0.0) -> Dict[str, Any]:
+        segment_data = {
+            "id": segment.id,
+            "start": segment.start + offset,
+            "end": segment.end + offset,
+            "text": segment.text,
+            "avg_logprob": segment.avg_logprob,
+            "no_speech_prob": segment.no_speech_prob,
+            "confidence": self._logprob_to_confidence(segment.avg_logprob),
+            "words": [],
+        }
+        for word in segment.words or []:
+            segment_data["words"].append({
+                "word": word.word,
+                "start": word.start + offset,
+                "end": word.end + offset,
+                "probability": word.probability,
+                "confidence": word.probability,
+            })
+        return segment_data
+
+    @staticmethod
+    def _build_result(segments: List[Dict[str, Any]], language: Optional[str], language_probability: float, duration: float) -> Dict[str, Any]:
+        return {
+            "text": " ".join(segment["text"] for segment in segments).strip(),
+            "language": language,
+            "language_probability": language_probability,
+            "duration": duration,
+            "segments": segments,
+            "words": [word for segment in segments for word in segment["words"]],
+        }
+
+    @staticmethod
+    def _record_metrics(result: Dict[str, Any]) -> None:
+        metrics.asr_requests.inc()
+        metrics.audio_duration_seconds.observe(result["duration"])
+        metrics.transcribed_words.inc(len(result["words"]))
+
     @staticmethod
     def _logprob_to_confidence(avg_logprob: float) -> float:
         import math
@@ -128,10 +443,8 @@ class WhisperTranscriber:
         return min(max(confidence, 0.0), 1.0)
 
     def cleanup(self) -> None:
-        if self.model is not None:
-            del self.model
-            self.model = None
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                gc.collect()
-            logger.info("Whisper model cleaned up")
+        if self._model is not None:
+            self.batched_model = None
+            self._model = None
+            model_registry.release(self._model_key)
+            logger.info("Whisper model released")
@@ -1,3 +1,21 @@
-from src.diarization.diarizer import SpeakerDiarizer
+import importlib
 
-__all__ = ["SpeakerDiarizer"]
+_EXPORTS = {
+    "SpeakerDiarizer": "src.diarization.diarizer",
+    "max_overlap_join": "src.diarization.intervals",
+    "max_overlap_join_numpy": "src.diarization.intervals",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
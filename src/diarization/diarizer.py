@@ -1,7 +1,14 @@
-from typing import Dict, List, Optional, Any
-import torch
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, Optional, Any, Union
+import numpy as np
 from loguru import logger
 
+from src.diarization.intervals import max_overlap_join
+from src.utils.models import model_registry
+
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
 
 class SpeakerDiarizer:
     def __init__(
@@ -10,6 +17,7 @@ class SpeakerDiarizer:
         device: str = "cuda",
         min_speakers: Optional[int] = None,
         max_speakers: Optional[int] = None,
+        preload: bool = False,
     ):
         self.hf_token = hf_token
         self.device = device
@@ -23,28 +31,38 @@ class SpeakerDiarizer:
         except ImportError:
             self.Pipeline = None
             self.available = False
+        if preload and self.available:
+            model_registry.preload(self._registry_key(), self._create_pipeline)
+
+    def _registry_key(self) -> tuple:
+        return ("pyannote", DIARIZATION_MODEL, self.device, None)
+
+    def _create_pipeline(self):
+        import torch
+        pipeline = self.Pipeline.from_pretrained(DIARIZATION_MODEL, use_auth_token=self.hf_token)
+        if torch.cuda.is_available() and self.device == "cuda":
+            pipeline.to(torch.device("cuda"))
+        return pipeline
 
     def _load_pipeline(self) -> None:
         if not self.available or self.pipeline is not None:
             return
         try:
-            self.pipeline = self.Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=self.hf_token,
-            )
-            if torch.cuda.is_available() and self.device == "cuda":
-                self.pipeline.to(torch.device("cuda"))
+            self.pipeline = model_registry.acquire(self._registry_key(), self._create_pipeline)
         except Exception as e:
             logger.error(f"Failed to load diarization pipeline: {e}")
             self.available = False
 
-    def diarize(self, audio_path: str) -> Dict[str, Any]:
+    def diarize(self, audio: Union[str, np.ndarray], sample_rate: int = 16000) -> Dict[str, Any]:
         if not self.available:
             return {"speakers": [], "segments": []}
         self._load_pipeline()
         try:
+            if isinstance(audio, np.ndarray):
+                import torch
+                audio = {"waveform": torch.from_numpy(audio.astype(np.float32, copy=False)).unsqueeze(0), "sample_rate": sample_rate}
             diarization = self.pipeline(
-                audio_path,
+                audio,
                 min_speakers=self.min_speakers,
                 max_speakers=self.max_speakers,
             )
@@ -64,30 +82,20 @@ class SpeakerDiarizer:
         if not diarization["segments"]:
             return transcription
         result = transcription.copy()
-        for word in result.get("words", []):
-            word["speaker"] = self._find_speaker_at_time(word["start"], diarization["segments"])
+        words = result.get("words", [])
+        turns = diarization["segments"]
+        matches = max_overlap_join([(w["start"], w["end"]) for w in words], [(t["start"], t["end"]) for t in turns])
+        for word, match in zip(words, matches):
+            word["speaker"] = turns[match]["speaker"] if match is not None else None
+        ordered = sorted(words, key=lambda w: w["start"])
+        starts = [w["start"] for w in ordered]
         for segment in result.get("segments", []):
-            segment_words = [
-                w for w in result.get("words", [])
-                if w["start"] >= segment["start"] and w["end"] <= segment["end"]
-            ]
-            if segment_words:
-                speakers = [w.get("speaker") for w in segment_words if w.get("speaker")]
-                segment["speaker"] = max(set(speakers), key=speakers.count) if speakers else None
-            else:
-                segment["speaker"] = None
+            candidates = ordered[bisect_left(starts, segment["start"]):bisect_right(starts, segment["end"])]
+            speakers = Counter(w["speaker"] for w in candidates if w["end"] <= segment["end"] and w.get("speaker"))
+            segment["speaker"] = speakers.most_common(1)[0][0] if speakers else None
         return result
 
-    @staticmethod
-    def _find_speaker_at_time(time: float, speaker_segments: List[Dict[str, Any]]) -> Optional[str]:
-        for segment in speaker_segments:
-            if segment["start"] <= time <= segment["end"]:
-                return segment["speaker"]
-        return None
-
     def cleanup(self) -> None:
         if self.pipeline is not None:
-            del self.pipeline
             self.pipeline = None
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            model_registry.release(self._registry_key())
@@ -0,0 +1,65 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+Interval = Tuple[float, float]
+
+NUMPY_JOIN_THRESHOLD = 20000
+
+
+def max_overlap_join(queries: Sequence[Interval], intervals: Sequence[Interval]) -> List[Optional[int]]:
+    if len(queries) >= NUMPY_JOIN_THRESHOLD:
+        return [None if i < 0 else int(i) for i in max_overlap_join_numpy(queries, intervals)]
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    starts = [intervals[i][0] for i in order]
+    result: List[Optional[int]] = [None] * len(queries)
+    active: List[Tuple[float, int]] = []
+    cursor = 0
+    for q in sorted(range(len(queries)), key=lambda q: queries[q][0]):
+        q_start, q_end = queries[q]
+        while cursor < len(order) and starts[cursor] <= q_start:
+            heapq.heappush(active, (intervals[order[cursor]][1], order[cursor]))
+            cursor += 1
+        while active and active[0][0] <= q_start:
+            heapq.heappop(active)
+        candidates = [i for _, i in active]
+        candidates.extend(order[bisect_right(starts, q_start):bisect_left(starts, q_end)])
+        best, best_overlap = None, float("-inf")
+        for i in candidates:
+            overlap = min(intervals[i][1], q_end) - max(intervals[i][0], q_start)
+            if overlap > best_overlap or (overlap == best_overlap and best is not None and intervals[i][0] < intervals[best][0]):
+                best, best_overlap = i, overlap
+        result[q] = best
+    return result
+
+
+def max_overlap_join_numpy(queries: Sequence[Interval], intervals: Sequence[Interval], max_cells: int = 4_000_000) -> np.ndarray:
+    queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+    result = np.full(len(queries), -1, dtype=np.int64)
+    if len(queries) == 0 or len(intervals) == 0:
+        return result
+    intervals = np.asarray(intervals, dtype=np.float64).reshape(-1, 2)
+    order = np.argsort(intervals[:, 0], kind="stable")
+    starts = intervals[order, 0]
+    ends = intervals[order, 1]
+    reach = np.maximum.accumulate(ends)
+    lo = np.searchsorted(reach, queries[:, 0], side="right")
+    hi = np.maximum(np.searchsorted(starts, queries[:, 1], side="left"), np.searchsorted(starts, queries[:, 0], side="right"))
+    width = int((hi - lo).max(initial=0))
+    if width <= 0:
+        return result
+    block = max(1, max_cells // width)
+    offsets = np.arange(width)
+    for begin in range(0, len(queries), block):
+        q = queries[begin:begin + block]
+        candidates = lo[begin:begin + block, None] + offsets
+        valid = candidates < hi[begin:begin + block, None]
+        candidates = np.minimum(candidates, len(starts) - 1)
+        overlap = np.minimum(ends[candidates], q[:, 1:2]) - np.maximum(starts[candidates], q[:, 0:1])
+        valid &= (overlap > 0) | ((starts[candidates] <= q[:, 0:1]) & (ends[candidates] > q[:, 0:1]))
+        overlap = np.where(valid, overlap, -np.inf)
+        best = overlap.argmax(axis=1)
+        found = valid[np.arange(len(q)), best]
+        result[begin:begin + block] = np.where(found, order[candidates[np.arange(len(q)), best]], -1)
+    return result
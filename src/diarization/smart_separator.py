@@ -2,6 +2,8 @@ from typing import Dict, List, Any
 from loguru import logger
 import re
 
+from src.diarization.intervals import max_overlap_join
+
 
 class SmartSpeakerSeparator:
     def __init__(self):
@@ -103,13 +105,12 @@ class SmartSpeakerSeparator:
 
     def _assign_speakers_to_words(self, words: List[Dict], segments: List[Dict]) -> List[Dict]:
         result = []
-        for word in words:
+        matches = max_overlap_join([(w["start"], w["end"]) for w in words], [(seg["start"], seg["end"]) for seg in segments])
+        for word, match in zip(words, matches):
             word_copy = word.copy()
-            for seg in segments:
-                if seg["start"] <= word["start"] <= seg["end"]:
-                    word_copy["speaker"] = seg["speaker"]
-                    word_copy["speaker_role"] = seg.get("speaker_role")
-                    break
+            if match is not None:
+                word_copy["speaker"] = segments[match]["speaker"]
+                word_copy["speaker_role"] = segments[match].get("speaker_role")
             result.append(word_copy)
         return result
 
@@ -1,6 +1,23 @@
-from src.llm.client import LLMClient
-from src.llm.vllm_backend import VLLMBackend
-from src.llm.tgi_backend import TGIBackend
-from src.llm.groq_backend import GroqBackend
+import importlib
 
-__all__ = ["LLMClient", "VLLMBackend", "TGIBackend", "GroqBackend"]
+_EXPORTS = {
+    "LLMClient": "src.llm.client",
+    "VLLMBackend": "src.llm.vllm_backend",
+    "TGIBackend": "src.llm.tgi_backend",
+    "GroqBackend": "src.llm.groq_backend",
+    "LLMResponseCache": "src.llm.cache",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
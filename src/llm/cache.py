@@ -0,0 +1,71 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+from loguru import logger
+
+from src.utils.cache import LRUCache
+
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        self.memory = LRUCache(max_entries=max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.conn = None
+        self._lock = threading.Lock()
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self.conn:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, created_at REAL)")
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        return re.sub(r"\s+", " ", prompt).strip()
+
+    @classmethod
+    def make_key(cls, backend: str, model: str, params: Dict[str, Any], prompt: str) -> str:
+        payload = json.dumps(
+            {"backend": backend, "model": model, "params": params, "prompt": cls.normalize_prompt(prompt)},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        response = self.memory.get(key)
+        if response is not None or self.conn is None:
+            return response
+        with self._lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds:
+            return None
+        response = json.loads(row[0])
+        self.memory.put(key, response)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        self.memory.put(key, response)
+        if self.conn is None:
+            return
+        try:
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(response, ensure_ascii=False), time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to persist LLM cache entry: {e}")
+
+    def close(self) -> None:
+        if self.conn is not None:
+            with self._lock:
+                self.conn.close()
+            self.conn = None
@@ -1,10 +1,15 @@
-from typing import Dict, Any, AsyncIterator
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, AsyncIterator, Optional, Tuple, Union
 from tenacity import retry, stop_after_attempt, wait_exponential
 from loguru import logger
 
 from src.llm.vllm_backend import VLLMBackend
 from src.llm.tgi_backend import TGIBackend
 from src.llm.groq_backend import GroqBackend
+from src.llm.cache import LLMResponseCache
+from src.llm.concurrency import AdaptiveConcurrencyLimiter, is_rate_limited
 from src.utils.metrics import metrics
 
 
@@ -19,6 +24,9 @@ class LLMClient:
         max_retries: int = 3,
         retry_delay: int = 2,
         timeout: int = 120,
+        cache: Optional[Union[Dict[str, Any], LLMResponseCache]] = None,
+        http: Optional[Dict[str, Any]] = None,
+        concurrency: Optional[Dict[str, Any]] = None,
         **backend_kwargs
     ):
         self.backend_type = backend.lower()
@@ -29,22 +37,82 @@ class LLMClient:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.timeout = timeout
+        self.cache = self._build_cache(cache)
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.limiter = AdaptiveConcurrencyLimiter(**(concurrency or {}))
         if self.backend_type == "vllm":
             self.backend = VLLMBackend(model=model, max_tokens=max_tokens, temperature=temperature, top_p=top_p, **backend_kwargs)
         elif self.backend_type == "tgi":
-            self.backend = TGIBackend(model=model, max_tokens=max_tokens, temperature=temperature, top_p=top_p, timeout=timeout, **backend_kwargs)
+            self.backend = TGIBackend(model=model, max_tokens=max_tokens, temperature=temperature, top_p=top_p, timeout=timeout, http=http, **backend_kwargs)
         elif self.backend_type == "groq":
             api_key = backend_kwargs.pop('api_key', None) or backend_kwargs.pop('groq_api_key', None)
             if not api_key:
                 import os
                 api_key = os.environ.get('GROQ_API_KEY')
-            self.backend = GroqBackend(model=model, max_tokens=max_tokens, temperature=temperature, top_p=top_p, api_key=api_key, timeout=timeout, **backend_kwargs)
+            self.backend = GroqBackend(model=model, max_tokens=max_tokens, temperature=temperature, top_p=top_p, api_key=api_key, timeout=timeout, http=http, **backend_kwargs)
         else:
             raise ValueError(f"Unsupported backend: {backend}")
         logger.info(f"LLM client initialized: {backend}, model: {model}")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True)
+    @staticmethod
+    def _build_cache(cache: Optional[Union[Dict[str, Any], LLMResponseCache]]) -> Optional[LLMResponseCache]:
+        if cache is None or isinstance(cache, LLMResponseCache):
+            return cache
+        if not cache.get("enabled", True):
+            return None
+        return LLMResponseCache(
+            max_entries=cache.get("max_entries", 1024),
+            db_path=cache.get("db_path"),
+            ttl_seconds=cache.get("ttl_seconds"),
+        )
+
+    def _cache_key(self, prompt: str, kwargs: Dict[str, Any]) -> str:
+        params = {"max_tokens": self.max_tokens, "temperature": self.temperature, "top_p": self.top_p, **kwargs}
+        return LLMResponseCache.make_key(self.backend_type, self.model, params, prompt)
+
+    def _claim(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[Future], Optional[Future]]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.llm_cache_hits.inc()
+            return dict(cached, cached=True), None, None
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is not None:
+                metrics.llm_cache_hits.inc()
+                return None, pending, None
+            self._inflight[key] = leader = Future()
+        metrics.llm_cache_misses.inc()
+        return None, None, leader
+
+    def _settle(self, key: str, leader: Future, result: Optional[Dict[str, Any]] = None, error: Optional[Exception] = None) -> None:
+        if error is None:
+            self.cache.put(key, result)
+            leader.set_result(result)
+        else:
+            leader.set_exception(error)
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        if self.cache is None:
+            return self._generate(prompt, **kwargs)
+        key = self._cache_key(prompt, kwargs)
+        cached, pending, leader = self._claim(key)
+        if cached is not None:
+            return cached
+        if pending is not None:
+            return dict(pending.result(), cached=True)
+        try:
+            result = self._generate(prompt, **kwargs)
+        except Exception as e:
+            self._settle(key, leader, error=e)
+            raise
+        self._settle(key, leader, result)
+        return result
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True)
+    def _generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         with metrics.llm_latency.time():
             try:
                 result = self.backend.generate(prompt, **kwargs)
@@ -56,8 +124,43 @@ class LLMClient:
                 logger.error(f"LLM generation failed: {e}")
                 raise
 
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        if self.cache is None:
+            return await self._agenerate(prompt, **kwargs)
+        key = self._cache_key(prompt, kwargs)
+        cached, pending, leader = self._claim(key)
+        if cached is not None:
+            return cached
+        if pending is not None:
+            return dict(await asyncio.wrap_future(pending), cached=True)
+        try:
+            result = await self._agenerate(prompt, **kwargs)
+        except Exception as e:
+            self._settle(key, leader, error=e)
+            raise
+        self._settle(key, leader, result)
+        return result
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True)
+    async def _agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        started = await self.limiter.acquire()
+        try:
+            with metrics.llm_latency.time():
+                result = await self.backend.agenerate(prompt, **kwargs)
+        except Exception as e:
+            self.limiter.release(started, throttled=is_rate_limited(e))
+            metrics.llm_errors.inc()
+            logger.error(f"LLM generation failed: {e}")
+            raise
+        self.limiter.release(started)
+        metrics.llm_requests.inc()
+        metrics.llm_tokens_generated.inc(result.get("tokens", 0))
+        return result
+
     async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
         token_count = 0
+        started = await self.limiter.acquire()
+        throttled = False
         try:
             async for chunk in self.backend.generate_stream(prompt, **kwargs):
                 token_count += chunk.get("tokens", 0)
@@ -65,10 +168,15 @@ class LLMClient:
             metrics.llm_requests.inc()
             metrics.llm_tokens_generated.inc(token_count)
         except Exception as e:
+            throttled = is_rate_limited(e)
             metrics.llm_errors.inc()
             logger.error(f"Streaming failed: {e}")
             raise
+        finally:
+            self.limiter.release(started, throttled=throttled)
 
     def cleanup(self) -> None:
         if hasattr(self.backend, 'cleanup'):
             self.backend.cleanup()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+from loguru import logger
+
+
+def is_rate_limited(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        latency_target_seconds: Optional[float] = None,
+        backoff: float = 0.5,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target = latency_target_seconds
+        self.backoff = backoff
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self) -> float:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._wake()
+                raise
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, throttled: bool = False) -> None:
+        self.in_flight -= 1
+        latency = time.monotonic() - started
+        if throttled or (self.latency_target and latency > self.latency_target):
+            if started >= self._last_decrease:
+                self.limit = max(float(self.min_concurrency), self.limit * self.backoff)
+                self._last_decrease = time.monotonic()
+                logger.warning(f"LLM concurrency reduced to {int(self.limit)} ({'rate limited' if throttled else f'latency {latency:.1f}s'})")
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(self._resolve, waiter)
+                free -= 1
+
+    @staticmethod
+    def _resolve(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
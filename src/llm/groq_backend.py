@@ -1,6 +1,8 @@
-from typing import Dict, Any, AsyncIterator
+from typing import Dict, Any, AsyncIterator, Optional
 from loguru import logger
 
+from src.llm.http import PerLoopClient, client_options
+
 
 class GroqBackend:
     def __init__(
@@ -11,6 +13,7 @@ class GroqBackend:
         top_p: float = 0.9,
         api_key: str = None,
         timeout: int = 120,
+        http: Optional[Dict[str, Any]] = None,
         **kwargs
     ):
         self.model = model
@@ -20,30 +23,52 @@ class GroqBackend:
         self.api_key = api_key
         self.timeout = timeout
         try:
-            from groq import Groq
-            self.client = Groq(api_key=api_key)
+            import httpx
+            from groq import AsyncGroq, Groq
+            options = client_options(http, timeout)
+            self.client = Groq(api_key=api_key, timeout=timeout, http_client=httpx.Client(**options))
+            self.async_clients = PerLoopClient(
+                lambda: AsyncGroq(api_key=api_key, timeout=timeout, http_client=httpx.AsyncClient(**options)),
+                closer=lambda client: client.close(),
+            )
             self.available = True
         except ImportError:
             self.client = None
+            self.async_clients = None
             self.available = False
             raise ImportError("Please install groq: pip install groq")
 
+    def _request(self, prompt: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "top_p": kwargs.get("top_p", self.top_p),
+        }
+
+    @staticmethod
+    def _parse(response: Any) -> Dict[str, Any]:
+        return {
+            "text": response.choices[0].message.content,
+            "tokens": response.usage.completion_tokens,
+            "finish_reason": response.choices[0].finish_reason,
+        }
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         if not self.available:
             raise RuntimeError("Groq client not available")
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=kwargs.get("max_tokens", self.max_tokens),
-                temperature=kwargs.get("temperature", self.temperature),
-                top_p=kwargs.get("top_p", self.top_p),
-            )
-            return {
-                "text": response.choices[0].message.content,
-                "tokens": response.usage.completion_tokens,
-                "finish_reason": response.choices[0].finish_reason,
-            }
+            return self._parse(self.client.chat.completions.create(**self._request(prompt, kwargs)))
+        except Exception as e:
+            logger.error(f"Groq generation failed: {e}")
+            raise
+
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        if not self.available:
+            raise RuntimeError("Groq client not available")
+        try:
+            return self._parse(await self.async_clients.get().chat.completions.create(**self._request(prompt, kwargs)))
         except Exception as e:
             logger.error(f"Groq generation failed: {e}")
             raise
@@ -52,20 +77,18 @@ class GroqBackend:
         if not self.available:
             raise RuntimeError("Groq client not available")
         try:
-            stream = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=kwargs.get("max_tokens", self.max_tokens),
-                temperature=kwargs.get("temperature", self.temperature),
-                top_p=kwargs.get("top_p", self.top_p),
-                stream=True,
-            )
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield {"text": chunk.choices[0].delta.content, "tokens": 1, "is_final": chunk.choices[0].finish_reason is not None}
+            stream = await self.async_clients.get().chat.completions.create(**self._request(prompt, kwargs), stream=True)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content or choice.finish_reason is not None:
+                    yield {"text": choice.delta.content or "", "tokens": 1 if choice.delta.content else 0, "is_final": choice.finish_reason is not None}
         except Exception as e:
             logger.error(f"Groq streaming failed: {e}")
             raise
 
     def cleanup(self) -> None:
-        pass
+        if self.client is not None:
+            self.client.close()
+            self.async_clients.close()
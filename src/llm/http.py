@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+
+def client_options(http: Optional[Dict[str, Any]] = None, timeout: float = 120) -> Dict[str, Any]:
+    import httpx
+    http = http or {}
+    options = {
+        "timeout": timeout,
+        "limits": httpx.Limits(
+            max_connections=http.get("max_connections", 100),
+            max_keepalive_connections=http.get("max_keepalive_connections", 20),
+            keepalive_expiry=http.get("keepalive_expiry", 30.0),
+        ),
+    }
+    if http.get("http2", False):
+        try:
+            import h2
+            options["http2"] = True
+        except ImportError:
+            logger.warning("HTTP/2 requested but h2 is not installed, falling back to HTTP/1.1")
+    return options
+
+
+class PerLoopClient:
+    def __init__(self, factory: Callable[[], Any], closer: Callable[[Any], Any] = lambda client: client.aclose()):
+        self.factory = factory
+        self.closer = closer
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._clients[loop] = self.factory()
+            return client
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await self.closer(client)
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for loop, client in clients:
+            try:
+                if loop.is_closed():
+                    continue
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(self.closer(client), loop)
+                else:
+                    loop.run_until_complete(self.closer(client))
+            except Exception as e:
+                logger.warning(f"Failed to close async HTTP client: {e}")
@@ -1,7 +1,9 @@
-from typing import Dict, Any, AsyncIterator
-import httpx
+import json
+from typing import Dict, Any, AsyncIterator, Optional
 from loguru import logger
 
+from src.llm.http import PerLoopClient, client_options
+
 
 class TGIBackend:
     def __init__(
@@ -12,6 +14,7 @@ class TGIBackend:
         top_p: float = 0.9,
         endpoint: str = "http://localhost:8080",
         timeout: int = 120,
+        http: Optional[Dict[str, Any]] = None,
         **kwargs
     ):
         self.model = model
@@ -20,26 +23,42 @@ class TGIBackend:
         self.top_p = top_p
         self.endpoint = endpoint.rstrip("/")
         self.timeout = timeout
-        self.client = httpx.Client(timeout=timeout)
-        self.async_client = httpx.AsyncClient(timeout=timeout)
+        import httpx
+        options = client_options(http, timeout)
+        self.client = httpx.Client(**options)
+        self.async_clients = PerLoopClient(lambda: httpx.AsyncClient(**options))
+
+    def _payload(self, prompt: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": kwargs.get("max_tokens", self.max_tokens),
+                "temperature": kwargs.get("temperature", self.temperature),
+                "top_p": kwargs.get("top_p", self.top_p),
+                "do_sample": True,
+                "return_full_text": False,
+            }
+        }
+
+    @staticmethod
+    def _parse(result: Any) -> Dict[str, Any]:
+        generated_text = result[0]["generated_text"] if isinstance(result, list) else result["generated_text"]
+        return {"text": generated_text, "tokens": len(generated_text.split()), "finish_reason": "stop"}
 
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         try:
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": kwargs.get("max_tokens", self.max_tokens),
-                    "temperature": kwargs.get("temperature", self.temperature),
-                    "top_p": kwargs.get("top_p", self.top_p),
-                    "do_sample": True,
-                    "return_full_text": False,
-                }
-            }
-            response = self.client.post(f"{self.endpoint}/generate", json=payload)
+            response = self.client.post(f"{self.endpoint}/generate", json=self._payload(prompt, kwargs))
+            response.raise_for_status()
+            return self._parse(response.json())
+        except Exception as e:
+            logger.error(f"TGI generation failed: {e}")
+            raise
+
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        try:
+            response = await self.async_clients.get().post(f"{self.endpoint}/generate", json=self._payload(prompt, kwargs))
             response.raise_for_status()
-            result = response.json()
-            generated_text = result[0]["generated_text"] if isinstance(result, list) else result["generated_text"]
-            return {"text": generated_text, "tokens": len(generated_text.split()), "finish_reason": "stop"}
+            return self._parse(response.json())
         except Exception as e:
             logger.error(f"TGI generation failed: {e}")
             raise
@@ -47,11 +66,10 @@ class TGIBackend:
     async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
         try:
             payload = {"inputs": prompt, "parameters": {"max_new_tokens": kwargs.get("max_tokens", self.max_tokens), "temperature": kwargs.get("temperature", self.temperature), "top_p": kwargs.get("top_p", self.top_p), "do_sample": True}, "stream": True}
-            async with self.async_client.stream("POST", f"{self.endpoint}/generate_stream", json=payload) as response:
+            async with self.async_clients.get().stream("POST", f"{self.endpoint}/generate_stream", json=payload) as response:
                 response.raise_for_status()
                 async for line in response.aiter_lines():
                     if line.startswith("data:"):
-                        import json
                         chunk = json.loads(line[5:].strip())
                         yield {"text": chunk.get("token", {}).get("text", ""), "tokens": 1, "is_final": chunk.get("generated_text") is not None}
         except Exception as e:
@@ -60,3 +78,4 @@ class TGIBackend:
 
     def cleanup(self) -> None:
         self.client.close()
+        self.async_clients.close()
@@ -1,8 +1,11 @@
-import gc
+import asyncio
+import threading
+import uuid
 from typing import Dict, Any, AsyncIterator, Optional
-import torch
 from loguru import logger
 
+from src.utils.models import model_registry
+
 
 class VLLMBackend:
     def __init__(
@@ -16,6 +19,8 @@ class VLLMBackend:
         gpu_memory_utilization: float = 0.85,
         max_model_len: Optional[int] = None,
         trust_remote_code: bool = False,
+        download_dir: str = "models/llm",
+        preload: bool = False,
         **kwargs
     ):
         self.model = model
@@ -23,7 +28,12 @@ class VLLMBackend:
         self.temperature = temperature
         self.top_p = top_p
         self.llm = None
+        self.engine = None
         self.sampling_params = None
+        self.download_dir = download_dir
+        self.quantization = quantization
+        self._load_lock = threading.Lock()
+        self._engine_lock = threading.Lock()
         try:
             from vllm import LLM, SamplingParams
             self.LLM = LLM
@@ -34,41 +44,101 @@ class VLLMBackend:
             self.SamplingParams = None
             self.available = False
             return
-        self._load_model(tensor_parallel_size=tensor_parallel_size, quantization=quantization, gpu_memory_utilization=gpu_memory_utilization, max_model_len=max_model_len, trust_remote_code=trust_remote_code, **kwargs)
+        self.sampling_params = self.SamplingParams(max_tokens=self.max_tokens, temperature=self.temperature, top_p=self.top_p)
+        load_kwargs = dict(
+            tensor_parallel_size=tensor_parallel_size,
+            quantization=quantization,
+            gpu_memory_utilization=gpu_memory_utilization,
+            max_model_len=max_model_len,
+            trust_remote_code=trust_remote_code,
+            **kwargs
+        )
+        self.load_kwargs = {k: v for k, v in load_kwargs.items() if v is not None}
+        if preload:
+            model_registry.preload(self._registry_key(), self._create_llm)
 
-    def _load_model(self, **kwargs) -> None:
-        if not self.available:
-            raise RuntimeError("vLLM not available")
+    def _registry_key(self) -> tuple:
+        return ("vllm", self.model, "cuda", self.quantization)
+
+    def _create_llm(self):
         try:
-            filtered_kwargs = {k: v for k, v in kwargs.items() if v is not None}
-            self.llm = self.LLM(model=self.model, download_dir="models/llm", **filtered_kwargs)
-            self.sampling_params = self.SamplingParams(max_tokens=self.max_tokens, temperature=self.temperature, top_p=self.top_p)
+            return self.LLM(model=self.model, download_dir=self.download_dir, **self.load_kwargs)
         except Exception as e:
             logger.error(f"Failed to load vLLM model: {e}")
             raise
 
+    def _engine_registry_key(self) -> tuple:
+        return ("vllm-async", self.model, "cuda", self.quantization)
+
+    def _create_engine(self):
+        from vllm import AsyncEngineArgs, AsyncLLMEngine
+        try:
+            return AsyncLLMEngine.from_engine_args(AsyncEngineArgs(model=self.model, download_dir=self.download_dir, **self.load_kwargs))
+        except Exception as e:
+            logger.error(f"Failed to start vLLM async engine: {e}")
+            raise
+
+    def _load_engine(self) -> None:
+        if not self.available:
+            raise RuntimeError("vLLM not available")
+        with self._engine_lock:
+            if self.engine is None:
+                self.engine = model_registry.acquire(self._engine_registry_key(), self._create_engine)
+
+    def _sampling_params(self, kwargs: Dict[str, Any]):
+        if not kwargs:
+            return self.sampling_params
+        return self.SamplingParams(max_tokens=kwargs.get("max_tokens", self.max_tokens), temperature=kwargs.get("temperature", self.temperature), top_p=kwargs.get("top_p", self.top_p))
+
+    def _load_model(self) -> None:
+        if not self.available:
+            raise RuntimeError("vLLM not available")
+        with self._load_lock:
+            if self.llm is None:
+                self.llm = model_registry.acquire(self._registry_key(), self._create_llm)
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        if self.llm is None:
-            raise RuntimeError("vLLM model not loaded")
+        self._load_model()
         try:
-            sampling_params = self.sampling_params
-            if kwargs:
-                sampling_params = self.SamplingParams(max_tokens=kwargs.get("max_tokens", self.max_tokens), temperature=kwargs.get("temperature", self.temperature), top_p=kwargs.get("top_p", self.top_p))
-            outputs = self.llm.generate([prompt], sampling_params)
+            outputs = self.llm.generate([prompt], self._sampling_params(kwargs))
             output = outputs[0]
             return {"text": output.outputs[0].text, "tokens": len(output.outputs[0].token_ids), "finish_reason": output.outputs[0].finish_reason}
         except Exception as e:
             logger.error(f"vLLM generation failed: {e}")
             raise
 
+    async def _engine_outputs(self, prompt: str, kwargs: Dict[str, Any]) -> AsyncIterator[Any]:
+        if self.engine is None:
+            await asyncio.to_thread(self._load_engine)
+        async for output in self.engine.generate(prompt, self._sampling_params(kwargs), uuid.uuid4().hex):
+            yield output
+
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        try:
+            output = None
+            async for output in self._engine_outputs(prompt, kwargs):
+                pass
+            completion = output.outputs[0]
+            return {"text": completion.text, "tokens": len(completion.token_ids), "finish_reason": completion.finish_reason}
+        except Exception as e:
+            logger.error(f"vLLM generation failed: {e}")
+            raise
+
     async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
-        result = self.generate(prompt, **kwargs)
-        yield {"text": result["text"], "tokens": result["tokens"], "is_final": True}
+        text, tokens = "", 0
+        try:
+            async for output in self._engine_outputs(prompt, kwargs):
+                completion = output.outputs[0]
+                yield {"text": completion.text[len(text):], "tokens": len(completion.token_ids) - tokens, "is_final": output.finished}
+                text, tokens = completion.text, len(completion.token_ids)
+        except Exception as e:
+            logger.error(f"vLLM streaming failed: {e}")
+            raise
 
     def cleanup(self) -> None:
         if self.llm is not None:
-            del self.llm
             self.llm = None
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                gc.collect()
+            model_registry.release(self._registry_key())
+        if self.engine is not None:
+            self.engine = None
+            model_registry.release(self._engine_registry_key())
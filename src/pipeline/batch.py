@@ -1,16 +1,25 @@
+import asyncio
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
-import yaml
+from typing import Callable, Dict, Any, List, Optional, Iterable, Iterator, Tuple
 from loguru import logger
 
-from src.asr import WhisperTranscriber, WhisperXRefiner
+from src.asr import WhisperTranscriber, WhisperXRefiner, TranscriptionCache
+from src.diarization import SpeakerDiarizer
 from src.llm import LLMClient
 from src.prompts import PromptTemplates, SPEAKER_IDENTIFICATION_PROMPT
+from src.pipeline.chunking import chunk_segments, estimate_tokens, merge_analyses, merge_speaker_results
+from src.pipeline.stages import run_stage_graph
 from src.validation import OutputValidator, repair_json
-from src.utils.audio import convert_audio, get_audio_duration
+from src.utils.audio import AudioInput, get_audio_duration, load_pcm
+from src.utils.config import load_config
 from src.utils.metrics import metrics
+from src.utils.models import model_registry
+
+
+DEFAULT_STAGE_DEPENDENCIES = {"speakers": [], "analysis": []}
 
 
 class BatchPipeline:
@@ -18,20 +27,13 @@ class BatchPipeline:
         self.config = self._load_config(config_path)
         self.transcriber: Optional[WhisperTranscriber] = None
         self.refiner: Optional[WhisperXRefiner] = None
+        self.diarizer: Optional[SpeakerDiarizer] = None
         self.llm_client: Optional[LLMClient] = None
         self.validator = OutputValidator()
         self._initialize_components()
 
     def _load_config(self, config_path: str) -> Dict[str, Any]:
-        local_config = Path("config.local.yaml")
-        if local_config.exists():
-            with open(local_config) as f:
-                return yaml.safe_load(f)
-        config_file = Path(config_path)
-        if not config_file.exists():
-            return self._default_config()
-        with open(config_file) as f:
-            return yaml.safe_load(f)
+        return load_config(config_path) or self._default_config()
 
     def _default_config(self) -> Dict[str, Any]:
         return {
@@ -41,15 +43,43 @@ class BatchPipeline:
         }
 
     def _initialize_components(self) -> None:
+        models_config = self.config.get("models", {})
+        model_registry.configure(idle_seconds=models_config.get("idle_seconds"))
         asr_config = self.config.get("asr", {})
+        cache_config = asr_config.get("cache", {})
+        cache = None
+        if cache_config.get("enabled", False):
+            cache = TranscriptionCache(
+                cache_dir=cache_config.get("dir", "cache/asr"),
+                max_size_mb=cache_config.get("max_size_mb", 2048),
+            )
         self.transcriber = WhisperTranscriber(
             model_size=asr_config.get("model", "small"),
             device=asr_config.get("device", "cpu"),
             compute_type=asr_config.get("compute_type", "int8"),
             language=asr_config.get("language", "en"),
             beam_size=asr_config.get("beam_size", 5),
-            vad_filter=asr_config.get("vad_filter", True)
+            vad_filter=asr_config.get("vad_filter", True),
+            cache=cache,
+            download_root=asr_config.get("download_root"),
+            preload=models_config.get("preload", False),
         )
+        diarization_config = self.config.get("diarization", {})
+        if self._speaker_method() in ("acoustic", "hybrid"):
+            self.diarizer = SpeakerDiarizer(
+                hf_token=diarization_config.get("hf_token"),
+                device=diarization_config.get("device", asr_config.get("device", "cpu")),
+                min_speakers=diarization_config.get("min_speakers"),
+                max_speakers=diarization_config.get("max_speakers"),
+                preload=models_config.get("preload", False),
+            )
+            if diarization_config.get("align_words", True):
+                cache_config = diarization_config.get("alignment_cache", {})
+                self.refiner = WhisperXRefiner(
+                    device=diarization_config.get("device", asr_config.get("device", "cpu")),
+                    max_cached_models=cache_config.get("max_models", 3),
+                    max_memory_mb=cache_config.get("max_memory_mb", 2048),
+                )
         llm_config = self.config.get("llm", {})
         api_key = llm_config.get("api_key")
         backend_kwargs = {k: v for k, v in llm_config.items() if k not in ["backend", "model", "max_tokens", "temperature", "top_p"]}
@@ -64,30 +94,27 @@ class BatchPipeline:
             **backend_kwargs
         )
 
-    def process(self, audio_path: str, output_path: Optional[str] = None, progress_callback=None) -> Dict[str, Any]:
+    def process(self, audio: AudioInput, output_path: Optional[str] = None, progress_callback=None, source_name: Optional[str] = None) -> Dict[str, Any]:
         start_time = time.time()
-        result = {"metadata": {"source_file": str(audio_path), "processing_time_seconds": 0}, "transcript": {}, "analysis": {}}
+        result = self._new_result(source_name or (str(audio) if isinstance(audio, (str, Path)) else "<memory>"))
         try:
             if progress_callback:
-                progress_callback(10, "Converting audio...")
-            processed_audio = self._prepare_audio(audio_path)
-            result["metadata"]["duration_seconds"] = get_audio_duration(processed_audio)
-            if progress_callback:
-                progress_callback(25, "Transcribing audio...")
-            transcription = self.transcriber.transcribe(processed_audio)
-            result["transcript"] = transcription
-            result["metadata"]["language"] = transcription.get("language", "unknown")
-            if progress_callback:
-                progress_callback(50, "Identifying speakers...")
-            if self.config.get("diarization", {}).get("enabled", True):
-                speaker_result = self._identify_speakers_with_llm(transcription)
-                if speaker_result:
-                    result["transcript"]["segments"] = speaker_result.get("segments", transcription.get("segments", []))
-                    result["speaker_profiles"] = speaker_result.get("speaker_profiles", {})
-            if progress_callback:
-                progress_callback(75, "Analyzing content...")
-            analysis = self._analyze_transcript(transcription)
-            result.update(analysis)
+                progress_callback(10, "Decoding audio...")
+            total = self._pipelined_duration(audio)
+            if total is not None:
+                source = audio
+                transcribe = lambda: self._transcribe_pipelined(audio, total, progress_callback)
+            else:
+                source = pcm = load_pcm(audio)
+                result["metadata"]["duration_seconds"] = round(len(pcm) / 16000, 3)
+                if progress_callback:
+                    progress_callback(25, "Transcribing audio...")
+                transcribe = lambda: self.transcriber.transcribe(pcm)
+            transcription, diarization = self._transcribe_with_diarization(transcribe, source)
+            if total is not None:
+                result["metadata"]["duration_seconds"] = round(transcription["duration"], 3)
+            transcription = self._align_and_assign(transcription, source, diarization)
+            self._process_transcription(result, transcription, progress_callback, diarization)
             result["metadata"]["processing_time_seconds"] = round(time.time() - start_time, 2)
             if output_path:
                 self._save_result(result, output_path)
@@ -99,16 +126,141 @@ class BatchPipeline:
             result["error"] = str(e)
             return result
 
-    def _prepare_audio(self, audio_path: str) -> str:
-        audio_file = Path(audio_path)
-        if audio_file.suffix.lower() in ['.wav'] and audio_file.stat().st_size < 100 * 1024 * 1024:
-            return str(audio_path)
-        return convert_audio(audio_path)
+    def _pipelined_duration(self, audio: AudioInput) -> Optional[float]:
+        stream_config = self.config.get("asr", {}).get("pipelined_decode", {})
+        if not stream_config.get("enabled", True) or not isinstance(audio, (str, Path)):
+            return None
+        total = get_audio_duration(str(audio))
+        if total < stream_config.get("threshold_seconds", 1800):
+            return None
+        return total
+
+    def _transcribe_pipelined(self, audio: AudioInput, total: float, progress_callback=None) -> Dict[str, Any]:
+        stream_config = self.config.get("asr", {}).get("pipelined_decode", {})
+        logger.info(f"Pipelined decode for {audio} ({total:.0f}s)")
+
+        def on_segment(segment: Dict[str, Any]) -> None:
+            if progress_callback:
+                progress_callback(25 + int(25 * min(segment["end"] / total, 1.0)), f"Transcribed {segment['end']:.0f}s of {total:.0f}s")
+
+        return self.transcriber.transcribe_large(
+            audio,
+            block_seconds=stream_config.get("block_seconds", 30),
+            queue_blocks=stream_config.get("queue_blocks", 4),
+            on_segment=on_segment,
+        )
+
+    def _transcribe_with_diarization(self, transcribe: Callable[[], Dict[str, Any]], audio: Any) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        if self.diarizer is None:
+            return transcribe(), None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            diarization = pool.submit(self.diarizer.diarize, audio)
+            transcription = transcribe()
+            return transcription, diarization.result()
+
+    def _align_and_assign(self, transcription: Dict[str, Any], audio: Any, diarization: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.refiner is not None and transcription.get("segments"):
+            transcription = self.refiner.refine(audio, transcription)
+        if diarization and diarization.get("segments"):
+            transcription = self.diarizer.assign_speakers_to_words(transcription, diarization)
+        return transcription
+
+    def process_many(self, audio_paths: Iterable[str], output_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        asr_config = self.config.get("asr", {})
+        start_time = time.time()
+        transcriptions = self.transcriber.transcribe_many(
+            audio_paths,
+            batch_size=asr_config.get("batch_size", 16),
+            prefetch=asr_config.get("prefetch_files", 2),
+        )
+        for audio_path, transcription in transcriptions:
+            result = self._new_result(audio_path)
+            try:
+                if "error" in transcription:
+                    raise RuntimeError(transcription["error"])
+                result["metadata"]["duration_seconds"] = transcription.get("duration", 0.0)
+                diarization = self.diarizer.diarize(audio_path) if self.diarizer else None
+                transcription = self._align_and_assign(transcription, audio_path, diarization)
+                self._process_transcription(result, transcription, diarization=diarization)
+                if output_dir:
+                    self._save_result(result, str(Path(output_dir) / f"{Path(audio_path).stem}_output.json"))
+            except Exception as e:
+                logger.error(f"Pipeline failed for {audio_path}: {e}")
+                result["error"] = str(e)
+            result["metadata"]["processing_time_seconds"] = round(time.time() - start_time, 2)
+            start_time = time.time()
+            yield result
+
+    @staticmethod
+    def _new_result(audio_path: str) -> Dict[str, Any]:
+        return {"metadata": {"source_file": str(audio_path), "processing_time_seconds": 0}, "transcript": {}, "analysis": {}}
+
+    def _process_transcription(self, result: Dict[str, Any], transcription: Dict[str, Any], progress_callback=None, diarization: Optional[Dict[str, Any]] = None) -> None:
+        result["transcript"] = transcription
+        result["metadata"]["language"] = transcription.get("language", "unknown")
+        if progress_callback:
+            progress_callback(50, "Identifying speakers and analyzing content...")
+        outputs = asyncio.run(self._run_llm_stages(transcription, self._acoustic_speakers(transcription, diarization)))
+        speaker_result = outputs.get("speakers")
+        if speaker_result:
+            result["transcript"]["segments"] = speaker_result.get("segments", transcription.get("segments", []))
+            result["speaker_profiles"] = speaker_result.get("speaker_profiles", {})
+        result.update(outputs["analysis"])
+
+    async def _run_llm_stages(self, transcription: Dict[str, Any], acoustic_speakers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        stages = {"analysis": lambda outputs: self._analyze_transcript(transcription, outputs.get("speakers"))}
+        method = self._speaker_method()
+        if acoustic_speakers is not None:
+            stages["speakers"] = lambda outputs: self._use_acoustic_speakers(acoustic_speakers)
+        elif method in ("llm_based", "hybrid"):
+            stages["speakers"] = lambda outputs: self._identify_speakers_with_llm(transcription)
+        dependencies = self.config.get("pipeline", {}).get("stage_dependencies", DEFAULT_STAGE_DEPENDENCIES)
+        return await run_stage_graph(stages, dependencies)
+
+    def _speaker_method(self) -> Optional[str]:
+        diarization_config = self.config.get("diarization", {})
+        if not diarization_config.get("enabled", True):
+            return None
+        return diarization_config.get("speaker_identification_method", "llm_based")
+
+    @staticmethod
+    def _acoustic_speakers(transcription: Dict[str, Any], diarization: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not diarization or not diarization.get("segments"):
+            return None
+        speaking_time: Dict[str, float] = {}
+        for turn in diarization["segments"]:
+            speaking_time[turn["speaker"]] = speaking_time.get(turn["speaker"], 0.0) + turn["end"] - turn["start"]
+        return {
+            "segments": transcription.get("segments", []),
+            "speaker_profiles": {speaker: {"speaking_time": round(seconds, 2)} for speaker, seconds in sorted(speaking_time.items())},
+        }
+
+    @staticmethod
+    async def _use_acoustic_speakers(acoustic_speakers: Dict[str, Any]) -> Dict[str, Any]:
+        return acoustic_speakers
 
-    def _identify_speakers_with_llm(self, transcription: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _chunk_transcript(self, segments: List[Dict[str, Any]]) -> Optional[List[List[Dict[str, Any]]]]:
+        chunk_config = self.config.get("pipeline", {}).get("chunking", {})
+        if not chunk_config.get("enabled", True):
+            return None
+        max_tokens = chunk_config.get("max_tokens_per_chunk", 3000)
+        if sum(estimate_tokens(seg.get("text", "")) for seg in segments) <= max_tokens:
+            return None
+        chunks = chunk_segments(segments, max_tokens=max_tokens, overlap_tokens=chunk_config.get("overlap_tokens", 200))
+        logger.info(f"Long transcript split into {len(chunks)} chunks")
+        return chunks
+
+    async def _identify_speakers_with_llm(self, transcription: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         segments = transcription.get("segments", [])
         if not segments:
             return None
+        chunks = self._chunk_transcript(segments)
+        if chunks is None:
+            return await self._identify_speakers_in_segments(segments)
+        chunk_results = await asyncio.gather(*(self._identify_speakers_in_segments(chunk) for chunk in chunks))
+        return merge_speaker_results(list(chunk_results))
+
+    async def _identify_speakers_in_segments(self, segments: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         transcript_lines = []
         for seg in segments:
             start = seg.get("start", 0)
@@ -119,7 +271,7 @@ class BatchPipeline:
         transcript_with_timestamps = "\n".join(transcript_lines)
         prompt = SPEAKER_IDENTIFICATION_PROMPT.format(transcript_with_timestamps=transcript_with_timestamps)
         try:
-            response = self.llm_client.generate(prompt, max_tokens=8000)
+            response = await self.llm_client.agenerate(prompt, max_tokens=8000)
             response_text = response.get("text", "")
             parsed = repair_json(response_text)
             if parsed and "segments" in parsed:
@@ -128,20 +280,55 @@ class BatchPipeline:
             logger.error(f"Speaker identification failed: {e}")
         return None
 
-    def _analyze_transcript(self, transcription: Dict[str, Any]) -> Dict[str, Any]:
+    async def _analyze_transcript(self, transcription: Dict[str, Any], speaker_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         full_text = transcription.get("text", "")
         segments = transcription.get("segments", [])
+        speakers = None
+        if speaker_result:
+            segments = speaker_result.get("segments", segments)
+            speakers = speaker_result.get("speaker_profiles")
+        chunks = self._chunk_transcript(segments)
+        if chunks is None:
+            analysis = await self._analyze_segments(full_text, segments, speakers)
+        else:
+            chunk_analyses = await asyncio.gather(*(
+                self._analyze_segments(
+                    " ".join(seg.get("text", "").strip() for seg in chunk),
+                    chunk,
+                    speakers,
+                    context=f"Part {index} of {len(chunks)} of a longer conversation",
+                )
+                for index, chunk in enumerate(chunks, start=1)
+            ))
+            chunk_analyses = [a for a in chunk_analyses if a]
+            analysis = await self._reduce_analyses(chunk_analyses) if chunk_analyses else None
+        if analysis:
+            return analysis
+        return {"summary": full_text[:500] if full_text else "", "action_items": [], "decisions": [], "key_points": []}
+
+    async def _analyze_segments(self, text: str, segments: List[Dict[str, Any]], speakers: Optional[Dict[str, Any]] = None, context: Optional[str] = None) -> Optional[Dict[str, Any]]:
         timestamps = [{"start": s.get("start"), "end": s.get("end"), "text": s.get("text")} for s in segments]
-        prompt = PromptTemplates.build_analysis_prompt(transcript=full_text, timestamps=timestamps)
+        prompt = PromptTemplates.build_analysis_prompt(transcript=text, timestamps=timestamps, speakers=speakers, context=context)
         try:
-            response = self.llm_client.generate(prompt)
+            response = await self.llm_client.agenerate(prompt)
             response_text = response.get("text", "")
-            analysis = self.validator.validate_and_repair(response_text)
-            if analysis:
-                return analysis
+            return self.validator.validate_and_repair(response_text)
         except Exception as e:
             logger.error(f"Analysis failed: {e}")
-        return {"summary": full_text[:500] if full_text else "", "action_items": [], "decisions": [], "key_points": []}
+        return None
+
+    async def _reduce_analyses(self, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        summary = None
+        summaries = [a.get("summary", "") for a in analyses if a.get("summary")]
+        if len(summaries) > 1:
+            try:
+                response = await self.llm_client.agenerate(PromptTemplates.build_summary_reduce_prompt(summaries))
+                parsed = repair_json(response.get("text", ""))
+                if parsed:
+                    summary = parsed.get("summary")
+            except Exception as e:
+                logger.error(f"Summary reduction failed: {e}")
+        return merge_analyses(analyses, summary=summary)
 
     def _save_result(self, result: Dict[str, Any], output_path: str) -> None:
         output_file = Path(output_path)
@@ -152,6 +339,8 @@ class BatchPipeline:
     def cleanup(self) -> None:
         if self.transcriber:
             self.transcriber.cleanup()
+        if self.diarizer:
+            self.diarizer.cleanup()
         if self.refiner:
             self.refiner.cleanup()
         if self.llm_client:
@@ -0,0 +1,129 @@
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+ANALYSIS_LIST_KEYS = {"action_items": "item", "decisions": "decision", "key_points": "point"}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def chunk_segments(segments: List[Dict[str, Any]], max_tokens: int = 3000, overlap_tokens: int = 200) -> List[List[Dict[str, Any]]]:
+    chunks = []
+    start = 0
+    while start < len(segments):
+        end = start
+        tokens = 0
+        while end < len(segments):
+            segment_tokens = estimate_tokens(segments[end].get("text", ""))
+            if end > start and tokens + segment_tokens > max_tokens:
+                break
+            tokens += segment_tokens
+            end += 1
+        chunks.append(segments[start:end])
+        if end >= len(segments):
+            break
+        next_start = end
+        overlap = 0
+        while next_start - 1 > start and overlap < overlap_tokens:
+            next_start -= 1
+            overlap += estimate_tokens(segments[next_start].get("text", ""))
+        start = next_start
+    return chunks
+
+
+def _same_segment(a: Dict[str, Any], b: Dict[str, Any], tolerance: float = 0.05) -> bool:
+    return abs(float(a.get("start", 0)) - float(b.get("start", 0))) <= tolerance
+
+
+def _label_mapping(previous: List[Dict[str, Any]], current: List[Dict[str, Any]], used_labels: set) -> Dict[str, str]:
+    votes = Counter()
+    for segment in current:
+        match = next((p for p in previous if _same_segment(p, segment)), None)
+        if match and match.get("speaker") and segment.get("speaker"):
+            votes[(segment["speaker"], match["speaker"])] += 1
+    mapping = {}
+    taken = set()
+    for (local, global_label), _ in votes.most_common():
+        if local not in mapping and global_label not in taken:
+            mapping[local] = global_label
+            taken.add(global_label)
+    next_id = len(used_labels) + 1
+    for label in sorted({s.get("speaker") for s in current if s.get("speaker")}):
+        if label in mapping:
+            continue
+        leftover = sorted(used_labels - taken)
+        if label not in taken:
+            mapping[label] = label
+        elif leftover:
+            mapping[label] = leftover[0]
+        else:
+            while f"SPEAKER_{next_id:02d}" in used_labels or f"SPEAKER_{next_id:02d}" in taken:
+                next_id += 1
+            mapping[label] = f"SPEAKER_{next_id:02d}"
+        taken.add(mapping[label])
+    return mapping
+
+
+def merge_speaker_results(chunk_results: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    merged_segments: List[Dict[str, Any]] = []
+    profiles: Dict[str, Any] = {}
+    used_labels: set = set()
+    previous: List[Dict[str, Any]] = []
+    for chunk_result in chunk_results:
+        if not chunk_result or not chunk_result.get("segments"):
+            previous = []
+            continue
+        segments = chunk_result["segments"]
+        mapping = _label_mapping(previous, segments, used_labels)
+        last_start = float(merged_segments[-1].get("start", 0)) if merged_segments else float("-inf")
+        relabelled = []
+        for segment in segments:
+            segment = dict(segment)
+            if segment.get("speaker"):
+                segment["speaker"] = mapping.get(segment["speaker"], segment["speaker"])
+            relabelled.append(segment)
+            if float(segment.get("start", 0)) > last_start + 0.05:
+                merged_segments.append(segment)
+        for local, profile in chunk_result.get("speaker_profiles", {}).items():
+            profiles.setdefault(mapping.get(local, local), profile)
+        used_labels.update(mapping.values())
+        previous = relabelled
+    if not merged_segments:
+        return None
+    return {"segments": merged_segments, "speaker_profiles": profiles}
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", re.sub(r"\s+", " ", str(text).lower())).strip()
+
+
+def merge_analyses(analyses: List[Dict[str, Any]], summary: Optional[str] = None) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {key: [] for key in ANALYSIS_LIST_KEYS}
+    for key, text_field in ANALYSIS_LIST_KEYS.items():
+        seen: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        for analysis in analyses:
+            for item in analysis.get(key, []) or []:
+                if not isinstance(item, dict) or not item.get(text_field):
+                    continue
+                normalized = _normalize(item[text_field])
+                if normalized not in seen:
+                    seen[normalized] = (len(merged[key]), item)
+                    merged[key].append(item)
+                elif item.get("confidence", 0) > seen[normalized][1].get("confidence", 0):
+                    index = seen[normalized][0]
+                    merged[key][index] = item
+                    seen[normalized] = (index, item)
+    topics = []
+    for analysis in analyses:
+        for topic in analysis.get("topics", []) or []:
+            if _normalize(topic) not in {_normalize(t) for t in topics}:
+                topics.append(topic)
+    merged["topics"] = topics
+    sentiments = [analysis.get("sentiment") for analysis in analyses if analysis.get("sentiment")]
+    if sentiments:
+        (top, top_count), *rest = Counter(sentiments).most_common()
+        merged["sentiment"] = top if not rest or top_count > rest[0][1] else "mixed"
+    merged["summary"] = summary if summary else " ".join(a.get("summary", "") for a in analyses if a.get("summary")).strip()
+    return merged
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def resolve_dependencies(stages: Dict[str, StageFn], dependencies: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    resolved = {name: [dep for dep in dependencies.get(name, []) if dep in stages] for name in stages}
+    visiting, done = set(), set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Cyclic stage dependency involving '{name}'")
+        visiting.add(name)
+        for dep in resolved[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in resolved:
+        visit(name)
+    return resolved
+
+
+async def run_stage_graph(stages: Dict[str, StageFn], dependencies: Dict[str, List[str]]) -> Dict[str, Any]:
+    resolved = resolve_dependencies(stages, dependencies)
+    outputs: Dict[str, Any] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(name: str) -> None:
+        if resolved[name]:
+            await asyncio.gather(*(tasks[dep] for dep in resolved[name]))
+        outputs[name] = await stages[name](outputs)
+
+    for name in stages:
+        tasks[name] = asyncio.ensure_future(run(name))
+    await asyncio.gather(*tasks.values())
+    return outputs
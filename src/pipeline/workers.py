@@ -0,0 +1,129 @@
+import multiprocessing
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Any, Optional
+from loguru import logger
+
+from src.utils.metrics import metrics
+
+_pipeline = None
+_progress_queue = None
+
+
+def _init_worker(config_path: str, progress_queue) -> None:
+    global _pipeline, _progress_queue
+    from src.pipeline.batch import BatchPipeline
+    _progress_queue = progress_queue
+    _pipeline = BatchPipeline(config_path=config_path)
+
+
+def _run_job(job_id: str, audio_path: str) -> Dict[str, Any]:
+    def progress_callback(progress: int, stage: str):
+        _progress_queue.put((job_id, progress, stage))
+    progress_callback(0, "Starting...")
+    return _pipeline.process(audio_path, progress_callback=progress_callback)
+
+
+def _ping() -> bool:
+    return _pipeline is not None
+
+
+class QueueFullError(Exception):
+    def __init__(self, queue_position: int):
+        super().__init__(f"Job queue is full (position {queue_position})")
+        self.queue_position = queue_position
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        num_workers: int = 2,
+        max_queue_size: int = 16,
+        config_path: str = "config.yaml",
+        on_progress: Optional[Callable[[str, int, str], None]] = None,
+    ):
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.on_progress = on_progress
+        context = multiprocessing.get_context("spawn")
+        self.progress_queue = context.Queue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(config_path, self.progress_queue),
+        )
+        self.waiting: "OrderedDict[str, Future]" = OrderedDict()
+        self.running: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._listener = threading.Thread(target=self._listen_progress, daemon=True)
+        self._listener.start()
+        logger.info(f"Worker pool started: {num_workers} workers, queue size {max_queue_size}")
+
+    def warm_up(self) -> None:
+        for _ in range(self.num_workers):
+            self.executor.submit(_ping)
+
+    def submit(self, job_id: str, audio_path: str, on_done: Callable[[str, Future], None]) -> int:
+        with self._lock:
+            if len(self.waiting) >= self.max_queue_size:
+                raise QueueFullError(len(self.waiting) + 1)
+            future = self.executor.submit(_run_job, job_id, audio_path)
+            self.waiting[job_id] = future
+            position = len(self.waiting)
+            metrics.active_jobs.inc()
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_done))
+        return position
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return len(self.waiting) >= self.max_queue_size
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        with self._lock:
+            if job_id in self.running:
+                return 0
+            for position, waiting_id in enumerate(self.waiting, start=1):
+                if waiting_id == job_id:
+                    return position
+        return None
+
+    def _mark_started(self, job_id: str) -> None:
+        with self._lock:
+            future = self.waiting.pop(job_id, None)
+            if future is not None:
+                self.running[job_id] = future
+
+    def _finish(self, job_id: str, future: Future, on_done: Callable[[str, Future], None]) -> None:
+        with self._lock:
+            self.waiting.pop(job_id, None)
+            self.running.pop(job_id, None)
+            metrics.active_jobs.dec()
+        try:
+            on_done(job_id, future)
+        except Exception as e:
+            logger.error(f"Job {job_id} completion handler failed: {e}")
+
+    def _listen_progress(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                job_id, progress, stage = self.progress_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._mark_started(job_id)
+            if self.on_progress:
+                try:
+                    self.on_progress(job_id, progress, stage)
+                except Exception as e:
+                    logger.error(f"Progress handler failed for job {job_id}: {e}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+        self._stopped.set()
+        self._listener.join(timeout=1.0)
+        logger.info("Worker pool stopped")
@@ -48,6 +48,49 @@ class PromptTemplates:
         ])
         return "\n".join(prompt_parts)
 
+    @staticmethod
+    def build_summary_reduce_prompt(summaries: List[str]) -> str:
+        prompt_parts = ["The following are summaries of consecutive parts of one conversation, in order.", ""]
+        for index, summary in enumerate(summaries, start=1):
+            prompt_parts.append(f"PART {index}: {summary}")
+        prompt_parts.extend([
+            "",
+            "Combine them into a single summary of the whole conversation (2-4 sentences).",
+            "Provide your answer as JSON:",
+            '{"summary": "..."}',
+            "",
+            "Rules:",
+            "- Use only information stated in the part summaries",
+            "- Return ONLY valid JSON, no additional text"
+        ])
+        return "\n".join(prompt_parts)
+
+    @staticmethod
+    def build_rolling_analysis_prompt(transcript_chunk: str, summary: str = "", insights: List[str] = None, action_items: List[str] = None, is_final: bool = False) -> str:
+        prompt_parts = ["You maintain a running analysis of a live conversation.", ""]
+        prompt_parts.extend(["Current summary:", summary or "[none yet]", ""])
+        if insights:
+            prompt_parts.append("Known insights:")
+            prompt_parts.extend(f"- {insight}" for insight in insights)
+            prompt_parts.append("")
+        if action_items:
+            prompt_parts.append("Known action items:")
+            prompt_parts.extend(f"- {item}" for item in action_items)
+            prompt_parts.append("")
+        prompt_parts.extend(["New transcript since the last update:", transcript_chunk, ""])
+        if is_final:
+            prompt_parts.extend(["This is the FINAL chunk. Make the summary cover the whole conversation.", ""])
+        prompt_parts.extend([
+            "Update the analysis as JSON:",
+            '{"updated_summary": "", "new_insights": [], "new_action_items": [], "confidence": 0.0}',
+            "",
+            "Rules:",
+            "- updated_summary replaces the current summary (2-4 sentences)",
+            "- List only insights and action items that are not already known",
+            "- Return ONLY valid JSON, no additional text"
+        ])
+        return "\n".join(prompt_parts)
+
     @staticmethod
     def build_streaming_prompt(transcript_chunk: str, previous_context: str = None, is_final: bool = False) -> str:
         prompt_parts = []
@@ -0,0 +1,3 @@
+from src.storage.job_store import JobStore, MemoryJobStore, SQLiteJobStore, create_job_store
+
+__all__ = ["JobStore", "MemoryJobStore", "SQLiteJobStore", "create_job_store"]
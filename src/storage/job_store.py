@@ -0,0 +1,251 @@
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from loguru import logger
+
+from src.utils.cache import LRUCache
+
+JOB_FIELDS = ("status", "progress", "stage", "error")
+INCOMPLETE_STATUSES = ("uploading", "queued", "processing")
+
+
+class JobStore:
+    def __init__(self, ttl_seconds: float = 24 * 3600, result_cache_size: int = 32, eviction_interval_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self.eviction_interval_seconds = eviction_interval_seconds
+        self.result_cache = LRUCache(max_entries=result_cache_size)
+        self._last_eviction = 0.0
+
+    def create(self, job_id: str, **fields) -> None:
+        self._maybe_evict()
+        self._create(job_id, self._job_fields(fields))
+
+    def update(self, job_id: str, **fields) -> None:
+        self._update(job_id, self._job_fields(fields))
+
+    def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._write_result(job_id, result)
+        self.result_cache.put(job_id, result)
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        result = self.result_cache.get(job_id)
+        if result is None:
+            result = self._read_result(job_id)
+            if result is not None:
+                self.result_cache.put(job_id, result)
+        return result
+
+    def delete(self, job_id: str) -> None:
+        self.result_cache.pop(job_id)
+        self._delete([job_id])
+
+    def evict_expired(self) -> int:
+        expired = self._expired_ids(time.time() - self.ttl_seconds)
+        for job_id in expired:
+            self.result_cache.pop(job_id)
+        if expired:
+            self._delete(expired)
+            logger.info(f"Evicted {len(expired)} expired jobs")
+        return len(expired)
+
+    def _maybe_evict(self) -> None:
+        now = time.time()
+        if now - self._last_eviction >= self.eviction_interval_seconds:
+            self._last_eviction = now
+            try:
+                self.evict_expired()
+            except Exception as e:
+                logger.error(f"Job eviction failed: {e}")
+
+    @staticmethod
+    def _job_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(fields) - set(JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        return fields
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def fail_incomplete(self, error: str) -> int:
+        raise NotImplementedError
+
+    def _create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _write_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _read_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _expired_ids(self, cutoff: float) -> List[str]:
+        raise NotImplementedError
+
+    def _delete(self, job_ids: List[str]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return {k: v for k, v in job.items() if k != "updated_at"} if job else None
+
+    def fail_incomplete(self, error: str) -> int:
+        return 0
+
+    def _create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            self.jobs[job_id] = {"job_id": job_id, "status": None, "progress": 0, "stage": None, "error": None, **fields, "updated_at": time.time()}
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields, updated_at=time.time())
+
+    def _write_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self.results[job_id] = result
+
+    def _read_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.results.get(job_id)
+
+    def _expired_ids(self, cutoff: float) -> List[str]:
+        with self._lock:
+            return [job_id for job_id, job in self.jobs.items() if job["updated_at"] < cutoff]
+
+    def _delete(self, job_ids: List[str]) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                self.jobs.pop(job_id, None)
+                self.results.pop(job_id, None)
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, db_path: str = "data/jobs.db", results_dir: str = "data/results", **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = Path(db_path)
+        self.results_dir = Path(results_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT, progress INTEGER DEFAULT 0, stage TEXT, error TEXT, "
+                "result_path TEXT, created_at REAL, updated_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs(updated_at)")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT job_id, status, progress, stage, error FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def fail_incomplete(self, error: str) -> int:
+        placeholders = ",".join("?" for _ in INCOMPLETE_STATUSES)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE status IN ({placeholders})",
+                (error, time.time(), *INCOMPLETE_STATUSES),
+            )
+        return cursor.rowcount
+
+    def _create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        now = time.time()
+        columns = ["job_id", *fields, "created_at", "updated_at"]
+        values = [job_id, *fields.values(), now, now]
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                values,
+            )
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                (*fields.values(), time.time(), job_id),
+            )
+
+    def _result_path(self, job_id: str) -> Path:
+        return self.results_dir / f"{job_id}.json.gz"
+
+    def _write_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        result_path = self._result_path(job_id)
+        tmp_path = result_path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        tmp_path.replace(result_path)
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE jobs SET result_path = ?, updated_at = ? WHERE job_id = ?", (str(result_path), time.time(), job_id))
+
+    def _read_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT result_path FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not row or not row["result_path"]:
+            return None
+        try:
+            with gzip.open(row["result_path"], "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read result for job {job_id}: {e}")
+            return None
+
+    def _expired_ids(self, cutoff: float) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,)).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def _delete(self, job_ids: List[str]) -> None:
+        for job_id in job_ids:
+            self._result_path(job_id).unlink(missing_ok=True)
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def create_job_store(config: Optional[Dict[str, Any]] = None) -> JobStore:
+    config = config or {}
+    kwargs = {
+        "ttl_seconds": config.get("ttl_hours", 24) * 3600,
+        "result_cache_size": config.get("result_cache_size", 32),
+    }
+    store_type = config.get("store", "sqlite").lower()
+    if store_type == "sqlite":
+        return SQLiteJobStore(
+            db_path=config.get("db_path", "data/jobs.db"),
+            results_dir=config.get("results_dir", "data/results"),
+            **kwargs
+        )
+    if store_type == "memory":
+        return MemoryJobStore(**kwargs)
+    raise ValueError(f"Unsupported job store: {store_type}")
@@ -1,4 +1,6 @@
 from src.streaming.vad import VoiceActivityDetector
+from src.streaming.online_asr import OnlineASRProcessor
+from src.streaming.scheduler import ASRBatchScheduler
 from src.streaming.server import StreamingServer
 
-__all__ = ["VoiceActivityDetector", "StreamingServer"]
+__all__ = ["VoiceActivityDetector", "OnlineASRProcessor", "ASRBatchScheduler", "StreamingServer"]
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+from loguru import logger
+
+from src.prompts import PromptTemplates
+from src.validation import repair_json
+
+
+class RollingAnalysis:
+    def __init__(self, max_insights: int = 20, max_action_items: int = 20, max_pending_chars: int = 8000):
+        self.max_insights = max_insights
+        self.max_action_items = max_action_items
+        self.max_pending_chars = max_pending_chars
+        self.summary = ""
+        self.insights: List[str] = []
+        self.action_items: List[str] = []
+        self.pending: List[str] = []
+        self.pending_chars = 0
+
+    def add(self, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        self.pending.append(text)
+        self.pending_chars += len(text) + 1
+        if self.pending_chars > self.max_pending_chars:
+            logger.warning("Streaming analysis is falling behind, dropping oldest unanalyzed text")
+        while len(self.pending) > 1 and self.pending_chars > self.max_pending_chars:
+            self.pending_chars -= len(self.pending.pop(0)) + 1
+
+    def take_pending(self) -> str:
+        text = " ".join(self.pending)
+        self.pending, self.pending_chars = [], 0
+        return text
+
+    def build_prompt(self, transcript_chunk: str, is_final: bool = False) -> str:
+        return PromptTemplates.build_rolling_analysis_prompt(transcript_chunk, self.summary, self.insights, self.action_items, is_final=is_final)
+
+    def update(self, response_text: str) -> Dict[str, Any]:
+        data = repair_json(response_text) or {}
+        if isinstance(data.get("updated_summary"), str) and data["updated_summary"].strip():
+            self.summary = data["updated_summary"].strip()
+        new_insights = self._merge(self.insights, data.get("new_insights"), self.max_insights)
+        new_action_items = self._merge(self.action_items, data.get("new_action_items"), self.max_action_items)
+        return {"summary": self.summary, "new_insights": new_insights, "new_action_items": new_action_items}
+
+    @staticmethod
+    def _merge(known: List[str], items: Any, limit: int) -> List[str]:
+        if not isinstance(items, list):
+            return []
+        seen = {item.lower() for item in known}
+        added = []
+        for item in items:
+            if isinstance(item, dict):
+                item = item.get("item") or item.get("point") or item.get("text") or ""
+            item = str(item).strip()
+            if item and item.lower() not in seen:
+                seen.add(item.lower())
+                added.append(item)
+        known.extend(added)
+        del known[:-limit]
+        return added
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"summary": self.summary, "insights": list(self.insights), "action_items": list(self.action_items)}
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class AudioBuffer:
+    def __init__(self, max_samples: int, initial_samples: int = 16000):
+        self.max_samples = max_samples
+        self._data = np.zeros(min(max(initial_samples, 1), 2 * max_samples), dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self._odd_byte = b""
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def view(self) -> np.ndarray:
+        return self._data[self._start:self._end]
+
+    def pcm16_samples(self, nbytes: int) -> int:
+        return (len(self._odd_byte) + nbytes) // 2
+
+    def extend(self, samples: np.ndarray) -> np.ndarray:
+        samples = samples[len(samples) - min(len(samples), self.max_samples):]
+        target = self._reserve(len(samples))
+        target[:] = samples
+        return target
+
+    def extend_pcm16(self, data: bytes) -> np.ndarray:
+        if self._odd_byte:
+            data = self._odd_byte + data
+        usable = len(data) - len(data) % 2
+        self._odd_byte = data[usable:]
+        pcm = np.frombuffer(data, dtype=np.int16, count=usable // 2)
+        pcm = pcm[len(pcm) - min(len(pcm), self.max_samples):]
+        target = self._reserve(len(pcm))
+        np.multiply(pcm, 1 / 32768.0, out=target, casting="unsafe")
+        return target
+
+    def discard(self, samples: int) -> None:
+        self._start = min(self._start + max(samples, 0), self._end)
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def clear(self) -> None:
+        self._start = self._end = 0
+        self._odd_byte = b""
+
+    def _reserve(self, samples: int) -> np.ndarray:
+        if self._end + samples > len(self._data):
+            length = len(self)
+            if length + samples > len(self._data) // 2 and len(self._data) < 2 * self.max_samples:
+                grown = np.zeros(min(max(2 * len(self._data), 2 * (length + samples)), 2 * self.max_samples), dtype=np.float32)
+                grown[:length] = self.view()
+                self._data = grown
+            else:
+                self._data[:length] = self.view()
+            self._start, self._end = 0, length
+        if self._end + samples > len(self._data):
+            raise ValueError("audio chunk exceeds buffer capacity")
+        self._end += samples
+        return self._data[self._end - samples:self._end]
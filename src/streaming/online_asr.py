@@ -0,0 +1,162 @@
+import re
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+from src.streaming.buffer import AudioBuffer
+
+Word = Tuple[float, float, str]
+
+
+def _normalize_word(text: str) -> str:
+    return re.sub(r"[^\w']", "", text.lower())
+
+
+class HypothesisBuffer:
+    def __init__(self):
+        self.committed_in_buffer: List[Word] = []
+        self.buffer: List[Word] = []
+        self.new: List[Word] = []
+        self.last_committed_time = 0.0
+
+    def insert(self, words: List[Word]) -> None:
+        self.new = [w for w in words if w[0] > self.last_committed_time - 0.1]
+        if not self.new or not self.committed_in_buffer:
+            return
+        if abs(self.new[0][0] - self.last_committed_time) < 1.0:
+            max_ngram = min(len(self.committed_in_buffer), len(self.new), 5)
+            for n in range(max_ngram, 0, -1):
+                tail = [_normalize_word(w[2]) for w in self.committed_in_buffer[-n:]]
+                head = [_normalize_word(w[2]) for w in self.new[:n]]
+                if tail == head:
+                    self.new = self.new[n:]
+                    break
+
+    def flush(self) -> List[Word]:
+        committed = []
+        while self.new and self.buffer:
+            if _normalize_word(self.new[0][2]) != _normalize_word(self.buffer[0][2]):
+                break
+            committed.append(self.new[0])
+            self.last_committed_time = self.new[0][1]
+            self.new.pop(0)
+            self.buffer.pop(0)
+        self.buffer = self.new
+        self.new = []
+        self.committed_in_buffer.extend(committed)
+        return committed
+
+    def pop_committed(self, time: float) -> None:
+        while self.committed_in_buffer and self.committed_in_buffer[0][1] <= time:
+            self.committed_in_buffer.pop(0)
+
+    def complete(self) -> List[Word]:
+        return self.buffer
+
+
+class OnlineASRProcessor:
+    def __init__(
+        self,
+        transcriber,
+        sample_rate: int = 16000,
+        buffer_trimming_seconds: float = 15.0,
+        prompt_chars: int = 200,
+        max_buffer_seconds: float = 60.0,
+    ):
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.buffer_trimming_seconds = buffer_trimming_seconds
+        self.prompt_chars = prompt_chars
+        self.committed: List[Word] = []
+        self.buffer = AudioBuffer(int(max_buffer_seconds * sample_rate), initial_samples=int(2 * buffer_trimming_seconds * sample_rate))
+        self.reset()
+
+    def reset(self, offset: float = 0.0) -> None:
+        self.buffer.discard(len(self.buffer))
+        self.buffer_time_offset = offset
+        self.hypothesis = HypothesisBuffer()
+        self.hypothesis.last_committed_time = offset
+
+    @property
+    def audio_buffer(self) -> np.ndarray:
+        return self.buffer.view()
+
+    def insert_audio_chunk(self, audio: np.ndarray) -> np.ndarray:
+        self._make_room(len(audio))
+        return self.buffer.extend(audio)
+
+    def insert_pcm16(self, data: bytes) -> np.ndarray:
+        self._make_room(self.buffer.pcm16_samples(len(data)))
+        return self.buffer.extend_pcm16(data)
+
+    def _make_room(self, samples: int) -> None:
+        overflow = len(self.buffer) + samples - self.buffer.max_samples
+        if overflow <= 0:
+            return
+        logger.warning(f"Streaming buffer full, dropping {overflow / self.sample_rate:.2f}s of audio")
+        self.buffer.discard(overflow)
+        self.buffer_time_offset += overflow / self.sample_rate
+        self.hypothesis.pop_committed(self.buffer_time_offset)
+
+    @property
+    def buffer_seconds(self) -> float:
+        return len(self.buffer) / self.sample_rate
+
+    def _prompt(self) -> Optional[str]:
+        previous = [w for w in self.committed[-100:] if w[1] <= self.buffer_time_offset]
+        prompt = "".join(w[2] for w in previous)[-self.prompt_chars:].strip()
+        return prompt or None
+
+    def process_iter(self) -> Dict[str, Any]:
+        if len(self.audio_buffer) == 0:
+            return self._output([])
+        return self.apply(self.transcriber.transcribe(self.audio_buffer, initial_prompt=self._prompt()))
+
+    def apply(self, transcription: Dict[str, Any]) -> Dict[str, Any]:
+        offset = self.buffer_time_offset
+        words = [(w["start"] + offset, w["end"] + offset, w["word"]) for w in transcription.get("words", [])]
+        self.hypothesis.insert(words)
+        committed = self.hypothesis.flush()
+        self.committed.extend(committed)
+        del self.committed[:-100]
+        if self.buffer_seconds > self.buffer_trimming_seconds and self.committed:
+            self._trim_at_segment(transcription.get("segments", []))
+        if self.buffer_seconds > 2 * self.buffer_trimming_seconds:
+            self._chunk_at(self.buffer_time_offset + self.buffer_seconds - self.buffer_trimming_seconds)
+        return self._output(committed)
+
+    def _trim_at_segment(self, segments: List[Dict[str, Any]]) -> None:
+        last_committed_end = self.committed[-1][1]
+        ends = [seg["end"] + self.buffer_time_offset for seg in segments[:-1]]
+        cut_points = [end for end in ends if end <= last_committed_end]
+        cut = cut_points[-1] if cut_points else last_committed_end
+        self._chunk_at(cut)
+
+    def discard_until(self, time: float) -> None:
+        self._chunk_at(time)
+
+    def _chunk_at(self, time: float) -> None:
+        cut_samples = int((time - self.buffer_time_offset) * self.sample_rate)
+        if cut_samples <= 0:
+            return
+        self.hypothesis.pop_committed(time)
+        self.buffer.discard(cut_samples)
+        self.buffer_time_offset = time
+
+    def _output(self, committed: List[Word]) -> Dict[str, Any]:
+        partial = self.hypothesis.complete()
+        return {
+            "committed": "".join(w[2] for w in committed).strip(),
+            "committed_start": committed[0][0] if committed else None,
+            "committed_end": committed[-1][1] if committed else None,
+            "partial": "".join(w[2] for w in partial).strip(),
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        remaining = self.hypothesis.complete()
+        self.committed.extend(remaining)
+        end_time = self.buffer_time_offset + self.buffer_seconds
+        output = self._output(remaining)
+        output["partial"] = ""
+        self.reset(offset=end_time)
+        return output
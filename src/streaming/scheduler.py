@@ -0,0 +1,100 @@
+import asyncio
+from collections import Counter, deque
+from concurrent.futures import Executor
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+
+class ASRBatchScheduler:
+    def __init__(
+        self,
+        transcriber,
+        executor: Optional[Executor] = None,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 50,
+        max_windows_per_connection: int = 1,
+        batch_size: int = 16,
+    ):
+        self.transcriber = transcriber
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_windows_per_connection = max_windows_per_connection
+        self.batch_size = batch_size
+        self.pending: Deque[Tuple[Hashable, np.ndarray, asyncio.Future]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for _, _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+
+    async def submit(self, key: Hashable, audio: np.ndarray) -> Dict[str, Any]:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((key, audio, future))
+        self._wakeup.set()
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._collect(loop)
+            batch = self._take_batch()
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.transcriber.transcribe_batch, [audio for _, audio, _ in batch], self.batch_size
+                )
+            except Exception as e:
+                logger.error(f"Batched streaming transcription failed: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _collect(self, loop: asyncio.AbstractEventLoop) -> None:
+        while not self.pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        deadline = loop.time() + self.max_wait
+        while len(self.pending) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def _take_batch(self) -> List[Tuple[Hashable, np.ndarray, asyncio.Future]]:
+        batch = []
+        deferred = []
+        per_connection: Counter = Counter()
+        while self.pending and len(batch) < self.max_batch_size:
+            item = self.pending.popleft()
+            if item[2].done():
+                continue
+            if per_connection[item[0]] >= self.max_windows_per_connection:
+                deferred.append(item)
+                continue
+            per_connection[item[0]] += 1
+            batch.append(item)
+        self.pending.extendleft(reversed(deferred))
+        return batch
@@ -1,6 +1,7 @@
 import asyncio
 import json
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
 import yaml
 from loguru import logger
 
@@ -11,9 +12,12 @@ except ImportError:
     WEBSOCKETS_AVAILABLE = False
 
 from src.asr import WhisperTranscriber
-from src.streaming.vad import VoiceActivityDetector
+from src.streaming.vad import StreamingVAD, VoiceActivityDetector
+from src.streaming.online_asr import OnlineASRProcessor
+from src.streaming.scheduler import ASRBatchScheduler
 from src.llm import LLMClient
-from src.prompts import PromptTemplates
+from src.streaming.analysis import RollingAnalysis
+from src.utils.models import model_registry
 
 
 class StreamingServer:
@@ -25,6 +29,9 @@ class StreamingServer:
         self.vad: Optional[VoiceActivityDetector] = None
         self.llm_client: Optional[LLMClient] = None
         self.active_connections: Dict[str, Any] = {}
+        self.asr_executor: Optional[ThreadPoolExecutor] = None
+        self.asr_semaphore: Optional[asyncio.Semaphore] = None
+        self.scheduler: Optional[ASRBatchScheduler] = None
 
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         try:
@@ -42,79 +49,230 @@ class StreamingServer:
             await asyncio.Future()
 
     def _initialize_components(self) -> None:
+        models_config = self.config.get("models", {})
+        model_registry.configure(idle_seconds=models_config.get("idle_seconds"))
         asr_config = self.config.get("asr", {})
+        streaming_config = self.config.get("streaming", {})
+        asr_workers = streaming_config.get("asr_workers", 2)
         self.transcriber = WhisperTranscriber(
             model_size=asr_config.get("model", "small"),
             device=asr_config.get("device", "cpu"),
             compute_type=asr_config.get("compute_type", "int8"),
-            language=asr_config.get("language", "en")
-        )
-        streaming_config = self.config.get("streaming", {})
-        self.vad = VoiceActivityDetector(
-            sample_rate=streaming_config.get("sample_rate", 16000),
-            aggressiveness=streaming_config.get("vad_aggressiveness", 3)
+            language=asr_config.get("language", "en"),
+            num_workers=asr_workers,
+            download_root=asr_config.get("download_root"),
+            preload=models_config.get("preload", False),
         )
+        self.asr_executor = ThreadPoolExecutor(max_workers=asr_workers, thread_name_prefix="asr")
+        self.asr_semaphore = asyncio.Semaphore(streaming_config.get("max_concurrent_asr", asr_workers))
+        batching_config = streaming_config.get("batching", {})
+        if batching_config.get("enabled", False):
+            self.scheduler = ASRBatchScheduler(
+                self.transcriber,
+                executor=self.asr_executor,
+                max_batch_size=batching_config.get("max_batch_size", 16),
+                max_wait_ms=batching_config.get("max_wait_ms", 50),
+                max_windows_per_connection=batching_config.get("max_windows_per_connection", 1),
+                batch_size=asr_config.get("batch_size", 16),
+            )
+        if streaming_config.get("vad_enabled", True):
+            self.vad = VoiceActivityDetector(
+                sample_rate=streaming_config.get("sample_rate", 16000),
+                aggressiveness=streaming_config.get("vad_aggressiveness", 3),
+                energy_threshold=streaming_config.get("vad_energy_threshold", 0.01),
+                hangover_ms=streaming_config.get("vad_hangover_ms", 240),
+            )
         llm_config = self.config.get("llm", {})
         api_key = llm_config.get("api_key")
         backend_kwargs = {}
         if api_key:
             backend_kwargs["api_key"] = api_key
+        for key in ("cache", "http", "concurrency"):
+            if llm_config.get(key):
+                backend_kwargs[key] = llm_config[key]
         self.llm_client = LLMClient(
             backend=llm_config.get("backend", "groq"),
             model=llm_config.get("model", "llama-3.3-70b-versatile"),
             **backend_kwargs
         )
 
-    async def _handle_connection(self, websocket, path) -> None:
+    async def _handle_connection(self, websocket, path=None) -> None:
         connection_id = id(websocket)
-        self.active_connections[connection_id] = {"websocket": websocket, "audio_buffer": b"", "transcript_context": ""}
+        streaming_config = self.config.get("streaming", {})
+        conn = {
+            "websocket": websocket,
+            "asr": OnlineASRProcessor(
+                self.transcriber,
+                sample_rate=streaming_config.get("sample_rate", 16000),
+                buffer_trimming_seconds=streaming_config.get("buffer_trimming_seconds", 15),
+                max_buffer_seconds=streaming_config.get("max_buffer_seconds", 60),
+            ),
+            "vad": StreamingVAD(self.vad) if self.vad else None,
+            "new_samples": 0,
+            "speech_pending": False,
+            "transcript": [],
+            "analysis": RollingAnalysis(
+                max_insights=streaming_config.get("max_insights", 20),
+                max_action_items=streaming_config.get("max_action_items", 20),
+            ),
+            "analyzed_until": 0.0,
+            "analysis_id": 0,
+            "inbox": asyncio.Queue(),
+            "outbox": asyncio.Queue(),
+            "analysis_queue": asyncio.Queue(),
+        }
+        self.active_connections[connection_id] = conn
+        tasks = [
+            asyncio.create_task(self._asr_worker(conn)),
+            asyncio.create_task(self._analysis_worker(conn)),
+            asyncio.create_task(self._send_worker(conn)),
+        ]
         try:
             async for message in websocket:
-                if isinstance(message, bytes):
-                    await self._process_audio_chunk(connection_id, message)
-                else:
-                    await self._handle_control_message(connection_id, message)
+                conn["inbox"].put_nowait(message)
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             del self.active_connections[connection_id]
 
-    async def _process_audio_chunk(self, connection_id: str, audio_data: bytes) -> None:
-        conn = self.active_connections[connection_id]
-        conn["audio_buffer"] += audio_data
+    async def _process_window(self, conn: Dict[str, Any]) -> Dict[str, Any]:
+        conn["new_samples"] = 0
+        conn["speech_pending"] = False
+        asr = conn["asr"]
+        if self.scheduler is None or len(asr.audio_buffer) == 0:
+            return await self._run_asr(asr.process_iter)
+        return asr.apply(await self.scheduler.submit(id(conn["websocket"]), asr.audio_buffer))
+
+    async def _run_asr(self, fn: Callable[..., Any], *args) -> Any:
+        async with self.asr_semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.asr_executor, fn, *args)
+
+    async def _asr_worker(self, conn: Dict[str, Any]) -> None:
+        inbox = conn["inbox"]
+        while True:
+            messages = [await inbox.get()]
+            while not inbox.empty():
+                messages.append(inbox.get_nowait())
+            for message in messages:
+                if isinstance(message, bytes):
+                    self._ingest_audio(conn, message)
+                else:
+                    await self._handle_control_message(conn, message)
+            await self._advance(conn)
+
+    async def _advance(self, conn: Dict[str, Any]) -> None:
         streaming_config = self.config.get("streaming", {})
-        chunk_duration = streaming_config.get("chunk_duration_seconds", 5)
-        sample_rate = streaming_config.get("sample_rate", 16000)
-        chunk_size = chunk_duration * sample_rate * 2
-        if len(conn["audio_buffer"]) >= chunk_size:
-            chunk = conn["audio_buffer"][:chunk_size]
-            conn["audio_buffer"] = conn["audio_buffer"][chunk_size:]
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                import wave
-                with wave.open(f.name, 'wb') as wav:
-                    wav.setnchannels(1)
-                    wav.setsampwidth(2)
-                    wav.setframerate(sample_rate)
-                    wav.writeframes(chunk)
-                temp_path = f.name
-            transcription = self.transcriber.transcribe(temp_path)
-            chunk_text = transcription.get("text", "")
-            conn["transcript_context"] += " " + chunk_text
-            prompt = PromptTemplates.build_streaming_prompt(chunk_text, conn["transcript_context"][-2000:])
-            response = self.llm_client.generate(prompt, max_tokens=512)
-            await conn["websocket"].send(json.dumps({"type": "transcription", "text": chunk_text, "analysis": response.get("text", "")}))
-
-    async def _handle_control_message(self, connection_id: str, message: str) -> None:
+        min_samples = streaming_config.get("min_chunk_seconds", 1.0) * streaming_config.get("sample_rate", 16000)
+        asr, vad = conn["asr"], conn["vad"]
+        paused = vad is not None and vad.silence_seconds >= streaming_config.get("flush_silence_seconds", 0.3)
+        if conn["speech_pending"] and (paused or conn["new_samples"] >= min_samples):
+            self._send_asr_output(conn, await self._process_window(conn))
+        if paused and asr.hypothesis.complete():
+            self._send_asr_output(conn, asr.finish())
+        if vad is not None and not (conn["speech_pending"] or vad.in_speech or asr.hypothesis.complete()):
+            asr.discard_until(vad.time - streaming_config.get("speech_pad_seconds", 0.2))
+
+    async def _send_worker(self, conn: Dict[str, Any]) -> None:
+        outbox = conn["outbox"]
+        while True:
+            job = await outbox.get()
+            try:
+                await job()
+            except websockets.exceptions.ConnectionClosed:
+                return
+            except Exception as e:
+                logger.error(f"Streaming output failed: {e}")
+
+    def _send(self, conn: Dict[str, Any], message: Dict[str, Any]) -> None:
+        payload = json.dumps(message)
+        conn["outbox"].put_nowait(lambda: conn["websocket"].send(payload))
+
+    def _ingest_audio(self, conn: Dict[str, Any], audio_data: bytes) -> None:
+        samples = conn["asr"].insert_pcm16(audio_data)
+        conn["new_samples"] += len(samples)
+        vad = conn["vad"]
+        if vad is None or vad.process(samples) or vad.in_speech:
+            conn["speech_pending"] = True
+
+    def _send_asr_output(self, conn: Dict[str, Any], output: Dict[str, Any], is_final: bool = False) -> None:
+        analysis = conn["analysis"]
+        if output["committed"]:
+            conn["transcript"].append(output["committed"])
+            analysis.add(output["committed"])
+            self._send(conn, {"type": "transcription", "text": output["committed"], "start": output["committed_start"], "end": output["committed_end"]})
+        if output["partial"]:
+            self._send(conn, {"type": "partial", "text": output["partial"]})
+        interval = self.config.get("streaming", {}).get("analysis_interval_seconds", 5)
+        committed_end = output["committed_end"] or conn["analyzed_until"]
+        if analysis.pending and (is_final or committed_end - conn["analyzed_until"] >= interval):
+            conn["analyzed_until"] = committed_end
+            conn["analysis_queue"].put_nowait(is_final)
+
+    async def _analysis_worker(self, conn: Dict[str, Any]) -> None:
+        queue = conn["analysis_queue"]
+        debounce = self.config.get("streaming", {}).get("analysis_debounce_ms", 0) / 1000
+        while True:
+            requests = [await queue.get()]
+            if debounce > 0:
+                await asyncio.sleep(debounce)
+            while not queue.empty():
+                requests.append(queue.get_nowait())
+            try:
+                await self._run_analysis(conn, any(requests))
+            except Exception as e:
+                logger.error(f"Streaming analysis failed: {e}")
+            finally:
+                for _ in requests:
+                    queue.task_done()
+
+    async def _run_analysis(self, conn: Dict[str, Any], is_final: bool) -> None:
+        analysis = conn["analysis"]
+        chunk_text = analysis.take_pending()
+        if not chunk_text:
+            return
+        prompt = analysis.build_prompt(chunk_text, is_final=is_final)
+        conn["analysis_id"] += 1
+        analysis_id = conn["analysis_id"]
+        if self.config.get("streaming", {}).get("stream_analysis", True):
+            parts = []
+            async for chunk in self.llm_client.generate_stream(prompt, max_tokens=512):
+                if chunk.get("text"):
+                    parts.append(chunk["text"])
+                    self._send(conn, {"type": "analysis_delta", "id": analysis_id, "delta": chunk["text"]})
+            text = "".join(parts)
+        else:
+            text = (await self.llm_client.agenerate(prompt, max_tokens=512)).get("text", "")
+        update = analysis.update(text)
+        self._send(conn, {
+            "type": "analysis",
+            "id": analysis_id,
+            "text": chunk_text,
+            "analysis": text,
+            "new_insights": update["new_insights"],
+            "new_action_items": update["new_action_items"],
+            "state": analysis.snapshot(),
+        })
+
+    async def _handle_control_message(self, conn: Dict[str, Any], message: str) -> None:
         try:
             data = json.loads(message)
-            if data.get("type") == "end_stream":
-                conn = self.active_connections[connection_id]
-                await conn["websocket"].send(json.dumps({"type": "stream_ended", "final_transcript": conn["transcript_context"]}))
         except json.JSONDecodeError:
-            pass
+            return
+        if data.get("type") == "end_stream":
+            if conn["speech_pending"]:
+                self._send_asr_output(conn, await self._process_window(conn))
+            self._send_asr_output(conn, conn["asr"].finish(), is_final=True)
+            await conn["analysis_queue"].join()
+            if conn["vad"] is not None:
+                conn["vad"].reset(offset=conn["asr"].buffer_time_offset)
+            self._send(conn, {"type": "stream_ended", "final_transcript": " ".join(conn["transcript"]).strip()})
 
     def cleanup(self) -> None:
+        if self.asr_executor:
+            self.asr_executor.shutdown(wait=False)
         if self.transcriber:
             self.transcriber.cleanup()
         if self.llm_client:
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Optional
+from typing import Dict, List, Optional
 from loguru import logger
 
 try:
@@ -10,7 +10,7 @@ except ImportError:
 
 
 class VoiceActivityDetector:
-    def __init__(self, sample_rate: int = 16000, frame_duration_ms: int = 30, aggressiveness: int = 3, energy_threshold: float = 0.01):
+    def __init__(self, sample_rate: int = 16000, frame_duration_ms: int = 30, aggressiveness: int = 3, energy_threshold: float = 0.01, hangover_ms: int = 0):
         self.sample_rate = sample_rate
         self.frame_duration_ms = frame_duration_ms
         self.aggressiveness = aggressiveness
@@ -25,6 +25,7 @@ class VoiceActivityDetector:
         else:
             self.use_webrtc = False
         self.frame_size = int(sample_rate * frame_duration_ms / 1000)
+        self.hangover_frames = hangover_ms // frame_duration_ms
 
     def is_speech(self, audio_frame: bytes) -> bool:
         if self.use_webrtc and self.vad:
@@ -39,20 +40,101 @@ class VoiceActivityDetector:
         energy = np.sqrt(np.mean(audio_array ** 2))
         return energy > self.energy_threshold
 
+    @staticmethod
+    def _to_float(audio: np.ndarray) -> np.ndarray:
+        if audio.dtype == np.int16:
+            return audio.astype(np.float32) / 32768.0
+        return audio.astype(np.float32, copy=False)
+
+    def frame_view(self, audio: np.ndarray) -> np.ndarray:
+        n_frames = len(audio) // self.frame_size
+        return audio[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+
+    def frame_energies(self, audio: np.ndarray) -> np.ndarray:
+        frames = self.frame_view(self._to_float(audio))
+        return np.sqrt(np.einsum("ij,ij->i", frames, frames) / self.frame_size)
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        audio = self._to_float(audio)
+        if self.use_webrtc and self.vad:
+            frames = self.frame_view((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16))
+            return np.fromiter((self.is_speech(frame.tobytes()) for frame in frames), dtype=bool, count=len(frames))
+        return self.frame_energies(audio) > self.energy_threshold
+
+    def smooth(self, mask: np.ndarray, history: Optional[np.ndarray] = None) -> np.ndarray:
+        if self.hangover_frames == 0:
+            return mask
+        if history is None:
+            history = np.zeros(self.hangover_frames, dtype=bool)
+        padded = np.concatenate([history, mask]).astype(np.int32)
+        return np.convolve(padded, np.ones(self.hangover_frames + 1, dtype=np.int32), mode="valid") > 0
+
+    def mask_to_segments(self, mask: np.ndarray, offset: float = 0.0, end_time: Optional[float] = None) -> List[Dict[str, float]]:
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        frame_seconds = self.frame_size / self.sample_rate
+        segments = [{"start": offset + float(s) * frame_seconds, "end": offset + float(e) * frame_seconds} for s, e in zip(starts, ends)]
+        if segments and end_time is not None and ends[-1] == len(mask):
+            segments[-1]["end"] = end_time
+        return segments
+
     def process_audio(self, audio_data: np.ndarray) -> list:
-        if audio_data.dtype == np.float32:
-            audio_data = (audio_data * 32767).astype(np.int16)
-        speech_segments = []
-        current_segment_start = None
-        for i in range(0, len(audio_data) - self.frame_size, self.frame_size):
-            frame = audio_data[i:i + self.frame_size].tobytes()
-            is_speech = self.is_speech(frame)
-            time_offset = i / self.sample_rate
-            if is_speech and current_segment_start is None:
-                current_segment_start = time_offset
-            elif not is_speech and current_segment_start is not None:
-                speech_segments.append({"start": current_segment_start, "end": time_offset})
-                current_segment_start = None
-        if current_segment_start is not None:
-            speech_segments.append({"start": current_segment_start, "end": len(audio_data) / self.sample_rate})
-        return speech_segments
+        mask = self.smooth(self.speech_mask(audio_data))
+        return self.mask_to_segments(mask, end_time=len(audio_data) / self.sample_rate)
+
+
+class StreamingVAD:
+    def __init__(self, detector: VoiceActivityDetector):
+        self.detector = detector
+        self.reset()
+
+    def reset(self, offset: float = 0.0) -> None:
+        self.remainder = np.zeros(0, dtype=np.float32)
+        self.history = np.zeros(self.detector.hangover_frames, dtype=bool)
+        self.time = offset
+        self.speech_start: Optional[float] = None
+        self.last_speech_end = offset
+
+    @property
+    def in_speech(self) -> bool:
+        return self.speech_start is not None
+
+    @property
+    def silence_seconds(self) -> float:
+        return 0.0 if self.in_speech else self.time - self.last_speech_end
+
+    def process(self, audio: np.ndarray) -> List[Dict[str, float]]:
+        detector = self.detector
+        audio = np.concatenate([self.remainder, detector._to_float(audio)])
+        usable = len(audio) // detector.frame_size * detector.frame_size
+        self.remainder = audio[usable:].copy()
+        if usable == 0:
+            return []
+        raw = detector.speech_mask(audio[:usable])
+        mask = detector.smooth(raw, self.history)
+        if detector.hangover_frames:
+            self.history = np.concatenate([self.history, raw])[-detector.hangover_frames:]
+        segments = detector.mask_to_segments(mask, offset=self.time)
+        closed = []
+        if self.speech_start is not None:
+            if mask[0]:
+                segments[0]["start"] = self.speech_start
+            else:
+                closed.append({"start": self.speech_start, "end": self.time})
+            self.speech_start = None
+        frame_seconds = detector.frame_size / detector.sample_rate
+        self.time += len(mask) * frame_seconds
+        if mask[-1]:
+            self.speech_start = segments.pop()["start"]
+        if mask.any():
+            self.last_speech_end = self.time if mask[-1] else segments[-1]["end"]
+        return closed + segments
+
+    def flush(self) -> List[Dict[str, float]]:
+        closed = []
+        if self.speech_start is not None:
+            closed.append({"start": self.speech_start, "end": self.time})
+            self.last_speech_end = self.time
+            self.speech_start = None
+        return closed
@@ -1,6 +1,29 @@
-from src.utils.audio import convert_audio, get_audio_duration, load_audio
-from src.utils.gpu import check_gpu_memory, get_optimal_device
-from src.utils.logger import setup_logger
-from src.utils.metrics import metrics
+import importlib
 
-__all__ = ["convert_audio", "get_audio_duration", "load_audio", "check_gpu_memory", "get_optimal_device", "setup_logger", "metrics"]
+_EXPORTS = {
+    "convert_audio": "src.utils.audio",
+    "get_audio_duration": "src.utils.audio",
+    "load_audio": "src.utils.audio",
+    "load_pcm": "src.utils.audio",
+    "stream_pcm": "src.utils.audio",
+    "check_gpu_memory": "src.utils.gpu",
+    "get_optimal_device": "src.utils.gpu",
+    "setup_logger": "src.utils.logger",
+    "metrics": "src.utils.metrics",
+    "ModelRegistry": "src.utils.models",
+    "model_registry": "src.utils.models",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
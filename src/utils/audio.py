@@ -1,7 +1,8 @@
+import io
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Iterable, Iterator, Optional, Tuple, Union, BinaryIO
 import numpy as np
 from loguru import logger
 
@@ -32,27 +33,146 @@ def convert_audio(
 
 
 def get_audio_duration(audio_path: str) -> float:
+    try:
+        import soundfile as sf
+        return float(sf.info(str(audio_path)).duration)
+    except Exception:
+        pass
+    try:
+        import av
+        with av.open(str(audio_path)) as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0]
+            if stream.duration is not None:
+                return float(stream.duration * stream.time_base)
+    except Exception:
+        pass
     cmd = ["ffprobe", "-i", str(audio_path), "-show_entries", "format=duration", "-v", "quiet", "-of", "csv=p=0"]
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
         if result.returncode == 0 and result.stdout.strip():
             return float(result.stdout.strip())
-    except (subprocess.TimeoutExpired, ValueError):
+    except (subprocess.TimeoutExpired, ValueError, FileNotFoundError):
         pass
     return 0.0
 
 
 def load_audio(audio_path: str, sample_rate: int = 16000) -> Tuple[np.ndarray, int]:
+    return load_pcm(audio_path, sample_rate=sample_rate), sample_rate
+
+
+AudioInput = Union[str, Path, bytes, bytearray, memoryview, BinaryIO, np.ndarray]
+
+
+def _read_soundfile(source, sample_rate: int) -> Optional[np.ndarray]:
     try:
         import soundfile as sf
-        audio, sr = sf.read(audio_path, dtype='float32')
-        if sr != sample_rate:
-            import librosa
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
-            sr = sample_rate
-        if len(audio.shape) > 1:
-            audio = audio.mean(axis=1)
-        return audio, sr
+    except ImportError:
+        return None
+    position = source.tell() if hasattr(source, "tell") else None
+    try:
+        with sf.SoundFile(source) as f:
+            if f.samplerate == sample_rate:
+                audio = f.read(dtype="float32", always_2d=True)
+                return audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1)
+    except Exception:
+        pass
+    if position is not None:
+        source.seek(position)
+    return None
+
+
+def load_pcm(audio: AudioInput, sample_rate: int = 16000) -> np.ndarray:
+    if isinstance(audio, np.ndarray):
+        return audio.astype(np.float32, copy=False)
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        audio = io.BytesIO(bytes(audio))
+    source = str(audio) if isinstance(audio, (str, Path)) else audio
+    pcm = _read_soundfile(source, sample_rate)
+    if pcm is not None:
+        return pcm
+    from faster_whisper import decode_audio
+    if not isinstance(audio, (str, Path)):
+        return decode_audio(audio, sampling_rate=sample_rate)
+    try:
+        return decode_audio(source, sampling_rate=sample_rate)
     except Exception as e:
-        logger.error(f"Failed to load audio: {e}")
-        raise
+        logger.warning(f"In-process decode failed for {audio}, falling back to ffmpeg: {e}")
+    converted = convert_audio(source, sample_rate=sample_rate)
+    try:
+        return decode_audio(converted, sampling_rate=sample_rate)
+    finally:
+        Path(converted).unlink(missing_ok=True)
+
+
+def _rebuffer(pieces: Iterable[np.ndarray], block_size: int) -> Iterator[np.ndarray]:
+    pending = []
+    pending_size = 0
+    for piece in pieces:
+        pending.append(piece)
+        pending_size += len(piece)
+        while pending_size >= block_size:
+            joined = np.concatenate(pending)
+            yield joined[:block_size]
+            pending = [joined[block_size:]]
+            pending_size = len(pending[0])
+    if pending_size:
+        yield np.concatenate(pending)
+
+
+def _decode_frames(source, sample_rate: int) -> Iterator[np.ndarray]:
+    import av
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    with av.open(source, mode="r", metadata_errors="ignore") as container:
+        frames = container.decode(audio=0)
+        while True:
+            try:
+                frame = next(frames)
+            except StopIteration:
+                break
+            except av.error.InvalidDataError:
+                continue
+            for resampled in resampler.resample(frame):
+                yield resampled.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+        for resampled in resampler.resample(None):
+            yield resampled.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+
+
+def _soundfile_blocks(source, sample_rate: int, block_size: int) -> Optional[Iterator[np.ndarray]]:
+    try:
+        import soundfile as sf
+    except ImportError:
+        return None
+    position = source.tell() if hasattr(source, "tell") else None
+    try:
+        f = sf.SoundFile(source)
+    except Exception:
+        f = None
+    if f is not None and f.samplerate == sample_rate:
+        def blocks():
+            with f:
+                for block in f.blocks(blocksize=block_size, dtype="float32", always_2d=True):
+                    yield block[:, 0] if block.shape[1] == 1 else block.mean(axis=1)
+        return blocks()
+    if f is not None:
+        f.close()
+    if position is not None:
+        source.seek(position)
+    return None
+
+
+def stream_pcm(audio: AudioInput, sample_rate: int = 16000, block_seconds: float = 30.0) -> Iterator[np.ndarray]:
+    block_size = int(block_seconds * sample_rate)
+    if isinstance(audio, np.ndarray):
+        audio = audio.astype(np.float32, copy=False)
+        for start in range(0, len(audio), block_size):
+            yield audio[start:start + block_size]
+        return
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        audio = io.BytesIO(bytes(audio))
+    source = str(audio) if isinstance(audio, (str, Path)) else audio
+    blocks = _soundfile_blocks(source, sample_rate, block_size)
+    if blocks is None:
+        blocks = _rebuffer(_decode_frames(source, sample_rate), block_size)
+    yield from blocks
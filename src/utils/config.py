@@ -0,0 +1,15 @@
+from pathlib import Path
+from typing import Dict, Any, Optional
+import yaml
+
+
+def load_config(config_path: str = "config.yaml") -> Optional[Dict[str, Any]]:
+    local_config = Path("config.local.yaml")
+    if local_config.exists():
+        with open(local_config) as f:
+            return yaml.safe_load(f)
+    config_file = Path(config_path)
+    if not config_file.exists():
+        return None
+    with open(config_file) as f:
+        return yaml.safe_load(f)
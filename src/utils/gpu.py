@@ -1,9 +1,9 @@
 from typing import Tuple, Optional
-import torch
 from loguru import logger
 
 
 def check_gpu_memory(device_id: int = 0) -> Tuple[float, float, float]:
+    import torch
     if not torch.cuda.is_available():
         return 0.0, 0.0, 0.0
     try:
@@ -18,6 +18,7 @@ def check_gpu_memory(device_id: int = 0) -> Tuple[float, float, float]:
 
 
 def get_optimal_device(min_memory_gb: float = 4.0) -> str:
+    import torch
     if not torch.cuda.is_available():
         return "cpu"
     try:
@@ -30,6 +31,7 @@ def get_optimal_device(min_memory_gb: float = 4.0) -> str:
 
 
 def clear_gpu_memory() -> None:
+    import torch
     if torch.cuda.is_available():
         torch.cuda.empty_cache()
         torch.cuda.synchronize()
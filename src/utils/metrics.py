@@ -10,7 +10,11 @@ class MetricsCollector:
         self.asr_requests = Counter('asr_requests_total', 'Total ASR requests')
         self.llm_requests = Counter('llm_requests_total', 'Total LLM requests')
         self.asr_errors = Counter('asr_errors_total', 'ASR errors')
+        self.asr_cache_hits = Counter('asr_cache_hits_total', 'ASR transcription cache hits')
+        self.asr_cache_misses = Counter('asr_cache_misses_total', 'ASR transcription cache misses')
         self.llm_errors = Counter('llm_errors_total', 'LLM errors')
+        self.llm_cache_hits = Counter('llm_cache_hits_total', 'LLM response cache hits')
+        self.llm_cache_misses = Counter('llm_cache_misses_total', 'LLM response cache misses')
         self.audio_duration_seconds = Histogram('audio_duration_seconds', 'Audio duration', buckets=[10, 30, 60, 120, 300, 600, 1800])
         self.transcribed_words = Counter('transcribed_words_total', 'Total transcribed words')
         self.llm_tokens_generated = Counter('llm_tokens_generated_total', 'LLM tokens generated')
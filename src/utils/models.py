@@ -0,0 +1,116 @@
+import gc
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from loguru import logger
+
+
+class _Entry:
+    def __init__(self):
+        self.model: Any = None
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.unload: Optional[Callable[[Any], None]] = None
+        self.pinned = False
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    def __init__(self, idle_seconds: float = 0.0):
+        self.idle_seconds = idle_seconds
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, idle_seconds: Optional[float] = None) -> None:
+        if idle_seconds is not None:
+            self.idle_seconds = idle_seconds
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any], unload: Optional[Callable[[Any], None]] = None) -> Any:
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            entry.refs += 1
+        try:
+            with entry.lock:
+                if entry.model is None:
+                    logger.info(f"Loading model {key}")
+                    entry.model = loader()
+                    entry.unload = unload
+                entry.last_used = time.monotonic()
+                return entry.model
+        except Exception:
+            self.release(key)
+            raise
+        finally:
+            self.evict_idle()
+
+    def release(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs = max(entry.refs - 1, 0)
+            entry.last_used = time.monotonic()
+            idle = entry.refs == 0
+        if idle and self.idle_seconds > 0:
+            timer = threading.Timer(self.idle_seconds, self.evict_idle)
+            timer.daemon = True
+            timer.start()
+        self.evict_idle()
+
+    def preload(self, key: Hashable, loader: Callable[[], Any], unload: Optional[Callable[[Any], None]] = None) -> Any:
+        model = self.acquire(key, loader, unload)
+        with self._lock:
+            self._entries[key].pinned = True
+        self.release(key)
+        return model
+
+    def evict_idle(self, idle_seconds: Optional[float] = None) -> List[Hashable]:
+        idle_seconds = self.idle_seconds if idle_seconds is None else idle_seconds
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                (key, self._entries.pop(key))
+                for key, entry in list(self._entries.items())
+                if entry.refs == 0 and not entry.pinned and now - entry.last_used >= idle_seconds
+            ]
+        for key, entry in idle:
+            self._unload(key, entry)
+        return [key for key, _ in idle]
+
+    def cleanup(self) -> None:
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        for key, entry in entries:
+            self._unload(key, entry)
+
+    @staticmethod
+    def _unload(key: Hashable, entry: _Entry) -> None:
+        with entry.lock:
+            if entry.model is None:
+                return
+            if entry.unload:
+                try:
+                    entry.unload(entry.model)
+                except Exception as e:
+                    logger.warning(f"Failed to unload model {key}: {e}")
+            entry.model = None
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logger.info(f"Unloaded model {key}")
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.model is not None
+
+    def refcount(self, key: Hashable) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refs if entry else 0
+
+
+model_registry = ModelRegistry()
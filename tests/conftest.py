@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_model_registry():
+    yield
+    from src.utils.models import model_registry
+    model_registry.cleanup()
+    model_registry.configure(idle_seconds=0.0)
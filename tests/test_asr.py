@@ -15,3 +15,169 @@ class TestWhisperTranscriber:
         assert WhisperTranscriber._logprob_to_confidence(-0.5) == pytest.approx(0.606, rel=0.01)
         assert WhisperTranscriber._logprob_to_confidence(-3.0) == pytest.approx(0.05, rel=0.01)
         assert WhisperTranscriber._logprob_to_confidence(0.0) == 1.0
+
+    def test_merge_spans(self):
+        from src.asr.transcriber import WhisperTranscriber
+        spans = [(0, 100), (150, 300), (900, 1000), (1100, 1200)]
+        assert WhisperTranscriber._merge_spans(spans, 500) == [(0, 300), (900, 1200)]
+        assert WhisperTranscriber._merge_spans([], 500) == []
+
+    @patch('src.asr.transcriber.load_pcm')
+    @patch('src.asr.transcriber.WhisperModel')
+    def test_transcribe_many_splits_batched_segments_per_file(self, mock_model, mock_decode):
+        import numpy as np
+        from src.asr.transcriber import WhisperTranscriber
+        audios = {"a.wav": np.zeros(16000 * 45, dtype=np.float32), "b.wav": np.zeros(16000 * 10, dtype=np.float32)}
+        mock_decode.side_effect = lambda path, sample_rate: audios[path]
+
+        def fake_transcribe(audio, clip_timestamps, **kwargs):
+            segments = [
+                Mock(id=i, start=clip["start"] + 0.5, end=clip["end"], text=f"clip {i}", avg_logprob=-0.5, no_speech_prob=0.0, words=[])
+                for i, clip in enumerate(clip_timestamps)
+            ]
+            return iter(segments), Mock(language="en", language_probability=1.0)
+
+        transcriber = WhisperTranscriber(model_size="small", device="cpu", language="en", vad_filter=False)
+        transcriber.batched_model = Mock(transcribe=Mock(side_effect=fake_transcribe))
+        results = dict(transcriber.transcribe_many(["a.wav", "b.wav"]))
+        assert transcriber.batched_model.transcribe.call_count == 1
+        assert [s["start"] for s in results["a.wav"]["segments"]] == [0.5, 30.5]
+        assert [s["start"] for s in results["b.wav"]["segments"]] == [0.5]
+        assert results["b.wav"]["duration"] == 10.0
+
+    @patch('src.asr.transcriber.WhisperModel')
+    def test_transcribe_large_carries_unfinished_segment(self, mock_model):
+        import numpy as np
+        from src.asr.transcriber import WhisperTranscriber
+        windows = []
+
+        def fake_transcribe(audio, **kwargs):
+            windows.append(len(audio) / 16000)
+            segments = [Mock(id=i, start=float(i * 4), end=float(i * 4 + 3), text=f" s{i}", avg_logprob=-0.5, no_speech_prob=0.0, words=[]) for i in range(int(len(audio) / 16000) // 4)]
+            return iter(segments), Mock(language="en", language_probability=1.0)
+
+        transcriber = WhisperTranscriber(model_size="small", device="cpu", language="en")
+        transcriber.model.transcribe.side_effect = fake_transcribe
+        emitted = []
+        result = transcriber.transcribe_large(np.zeros(16000 * 25, dtype=np.float32), block_seconds=10, queue_blocks=1, on_segment=emitted.append)
+        assert windows == [10.0, 16.0, 9.0, 5.0]
+        assert [s["start"] for s in result["segments"]] == [0.0, 4.0, 8.0, 12.0, 16.0, 20.0]
+        assert [s["id"] for s in emitted] == [1, 2, 3, 4, 5, 6]
+        assert result["duration"] == 25.0
+
+
+class TestTranscriptionCache:
+    def test_key_depends_on_audio_and_settings(self):
+        import numpy as np
+        from src.asr.cache import TranscriptionCache
+        audio = np.zeros(1600, dtype=np.float32)
+        key = TranscriptionCache.make_key(audio, {"model_size": "small", "beam_size": 5})
+        assert key == TranscriptionCache.make_key(audio.copy(), {"beam_size": 5, "model_size": "small"})
+        assert key != TranscriptionCache.make_key(audio, {"model_size": "small", "beam_size": 1})
+        assert key != TranscriptionCache.make_key(audio + 0.1, {"model_size": "small", "beam_size": 5})
+
+    def test_size_bounded_lru_eviction(self, tmp_path):
+        import os
+        from src.asr.cache import TranscriptionCache
+        cache = TranscriptionCache(cache_dir=str(tmp_path), max_size_mb=0.001)
+        payload = {"text": os.urandom(600).hex()}
+        cache.put("aa" + "0" * 62, payload)
+        os.utime(cache._path("aa" + "0" * 62), (1, 1))
+        cache.put("bb" + "0" * 62, payload)
+        assert cache.get("aa" + "0" * 62) is None
+        assert cache.get("bb" + "0" * 62) == payload
+
+    @patch('src.asr.transcriber.WhisperModel')
+    def test_transcribe_uses_cache(self, mock_model, tmp_path):
+        import numpy as np
+        from src.asr.cache import TranscriptionCache
+        from src.asr.transcriber import WhisperTranscriber
+        mock_model.return_value.transcribe.return_value = (iter([]), Mock(language="en", language_probability=1.0, duration=1.0))
+        transcriber = WhisperTranscriber(model_size="small", device="cpu", cache=TranscriptionCache(cache_dir=str(tmp_path)))
+        audio = np.zeros(16000, dtype=np.float32)
+        first = transcriber.transcribe(audio)
+        second = transcriber.transcribe(audio)
+        assert first == second
+        assert mock_model.return_value.transcribe.call_count == 1
+
+
+class TestLoadPcm:
+    def test_decodes_in_process_without_subprocesses(self, tmp_path):
+        import numpy as np
+        import soundfile as sf
+        from src.utils.audio import get_audio_duration, load_pcm
+        stereo = np.stack([np.linspace(-0.5, 0.5, 16000), np.zeros(16000)], axis=1).astype(np.float32)
+        native = tmp_path / "native.wav"
+        sf.write(native, stereo, 16000)
+        resampled = tmp_path / "resampled.wav"
+        sf.write(resampled, stereo, 8000)
+        with patch("subprocess.run", side_effect=AssertionError("subprocess spawned")):
+            pcm = load_pcm(str(native))
+            assert pcm.dtype == np.float32 and pcm.shape == (16000,)
+            assert pcm[-1] == pytest.approx(0.25, abs=1e-3)
+            assert load_pcm(native.read_bytes()).shape == (16000,)
+            assert abs(len(load_pcm(str(resampled))) - 32000) < 100
+            assert get_audio_duration(str(resampled)) == pytest.approx(2.0)
+
+
+class TestModelRegistry:
+    @patch('src.asr.transcriber.WhisperModel')
+    def test_transcribers_share_one_lazily_loaded_model(self, mock_model):
+        from src.asr.transcriber import WhisperTranscriber
+        from src.utils.models import model_registry
+        first = WhisperTranscriber(model_size="small", device="cpu", compute_type="int8")
+        second = WhisperTranscriber(model_size="small", device="cpu", compute_type="int8")
+        assert mock_model.call_count == 0
+        assert first.model is second.model
+        assert mock_model.call_count == 1
+        key = ("whisper", "small", "cpu", "int8")
+        assert model_registry.refcount(key) == 2
+        first.cleanup()
+        assert key in model_registry
+        second.cleanup()
+        assert key not in model_registry
+
+    def test_preload_pins_and_idle_eviction(self):
+        from src.utils.models import ModelRegistry
+        registry = ModelRegistry(idle_seconds=60)
+        unloaded = []
+        registry.preload("pinned", lambda: "p", unload=unloaded.append)
+        registry.acquire("warm", lambda: "w", unload=unloaded.append)
+        registry.release("warm")
+        assert registry.evict_idle() == []
+        assert registry.evict_idle(idle_seconds=0) == ["warm"]
+        assert "pinned" in registry and unloaded == ["w"]
+        registry.cleanup()
+        assert unloaded == ["w", "p"]
+
+
+class TestWhisperXRefiner:
+    def _refiner(self, **kwargs):
+        from src.asr.refiner import WhisperXRefiner
+        refiner = WhisperXRefiner(device="cpu", **kwargs)
+        refiner.whisperx = Mock()
+        refiner.whisperx.load_align_model.side_effect = lambda language_code, **_: (Mock(language=language_code), {})
+        refiner.whisperx.align.return_value = {"segments": []}
+        refiner.available = True
+        return refiner
+
+    def test_alignment_models_cached_per_language(self):
+        import numpy as np
+        from src.utils.models import model_registry
+        refiner = self._refiner(max_cached_models=2)
+        audio = np.zeros(16000, dtype=np.float32)
+        for language in ["en", "es", "en", "fr", "en"]:
+            refiner.refine(audio, {"language": language, "segments": []})
+        loaded = [c.kwargs["language_code"] for c in refiner.whisperx.load_align_model.call_args_list]
+        assert loaded == ["en", "es", "fr"]
+        assert ("whisperx-align", "es", "cpu", None) not in model_registry
+        refiner.cleanup()
+        assert ("whisperx-align", "en", "cpu", None) not in model_registry
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        refiner = self._refiner(max_memory_mb=1)
+        with patch.object(refiner, "_estimate_bytes", return_value=700 * 1024):
+            refiner._alignment_model("en")
+            refiner._alignment_model("es")
+        assert "en" not in refiner.alignment_models and "es" in refiner.alignment_models
+        refiner.cleanup()
@@ -0,0 +1,23 @@
+import pytest
+
+
+class TestIntervalJoin:
+    def test_picks_speaker_with_max_overlap(self):
+        from src.diarization.intervals import max_overlap_join, max_overlap_join_numpy
+        turns = [(0.0, 5.0), (4.0, 10.0), (12.0, 15.0)]
+        words = [(1.0, 1.5), (4.2, 5.5), (4.0, 4.0), (10.5, 11.0), (14.0, 16.0)]
+        assert max_overlap_join(words, turns) == [0, 1, 0, None, 2]
+        assert max_overlap_join_numpy(words, turns, max_cells=2).tolist() == [0, 1, 0, -1, 2]
+        assert max_overlap_join(words, []) == [None] * 5
+
+
+class TestSpeakerDiarizer:
+    def test_assign_speakers_to_words(self):
+        from src.diarization.diarizer import SpeakerDiarizer
+        diarizer = SpeakerDiarizer.__new__(SpeakerDiarizer)
+        words = [{"start": 0.1, "end": 0.4}, {"start": 0.5, "end": 0.9}, {"start": 1.2, "end": 1.6}]
+        transcription = {"words": words, "segments": [{"start": 0.0, "end": 1.0}, {"start": 1.1, "end": 2.0}]}
+        diarization = {"segments": [{"start": 0.0, "end": 1.1, "speaker": "A"}, {"start": 0.8, "end": 2.0, "speaker": "B"}]}
+        result = diarizer.assign_speakers_to_words(transcription, diarization)
+        assert [w["speaker"] for w in result["words"]] == ["A", "A", "B"]
+        assert [s["speaker"] for s in result["segments"]] == ["A", "B"]
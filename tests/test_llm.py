@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from unittest.mock import Mock, patch
+
+
+class TestLLMResponseCache:
+    def test_key_normalizes_whitespace(self):
+        from src.llm.cache import LLMResponseCache
+        params = {"max_tokens": 512, "temperature": 0.1}
+        key = LLMResponseCache.make_key("groq", "llama", params, "Summarize:\n  hello   world ")
+        assert key == LLMResponseCache.make_key("groq", "llama", params, "Summarize: hello world")
+        assert key != LLMResponseCache.make_key("groq", "llama", {**params, "temperature": 0.7}, "Summarize: hello world")
+        assert key != LLMResponseCache.make_key("tgi", "llama", params, "Summarize: hello world")
+
+    def test_sqlite_persistence(self, tmp_path):
+        from src.llm.cache import LLMResponseCache
+        db_path = str(tmp_path / "llm.db")
+        cache = LLMResponseCache(db_path=db_path)
+        cache.put("k", {"text": "cached", "tokens": 3})
+        cache.close()
+        reopened = LLMResponseCache(db_path=db_path)
+        assert reopened.get("k") == {"text": "cached", "tokens": 3}
+        reopened.close()
+
+
+class TestLLMClientCache:
+    @patch('src.llm.client.GroqBackend')
+    def test_generate_hits_cache(self, mock_backend):
+        from src.llm.client import LLMClient
+        mock_backend.return_value.generate.return_value = {"text": "answer", "tokens": 1, "finish_reason": "stop"}
+        client = LLMClient(backend="groq", model="llama", api_key="key", cache={"max_entries": 8})
+        assert client.generate("hello  world")["text"] == "answer"
+        second = client.generate("hello world")
+        assert second["text"] == "answer" and second["cached"] is True
+        client.generate("hello world", max_tokens=10)
+        assert mock_backend.return_value.generate.call_count == 2
+
+    @patch('src.llm.client.GroqBackend')
+    def test_cache_disabled(self, mock_backend):
+        from src.llm.client import LLMClient
+        mock_backend.return_value.generate.return_value = {"text": "answer", "tokens": 1}
+        client = LLMClient(backend="groq", model="llama", api_key="key", cache={"enabled": False})
+        client.generate("hello")
+        client.generate("hello")
+        assert client.cache is None
+        assert mock_backend.return_value.generate.call_count == 2
+
+
+class TestGroqStreaming:
+    def test_stream_uses_async_client(self):
+        import asyncio
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock
+        from src.llm.groq_backend import GroqBackend
+
+        def chunk(content, finish_reason=None):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+        async def stream():
+            for c in [chunk("Hel"), chunk("lo"), chunk(None, "stop")]:
+                yield c
+
+        backend = GroqBackend(model="llama", api_key="key")
+        backend.client = Mock()
+        async_client = Mock()
+        async_client.chat.completions.create = AsyncMock(return_value=stream())
+        backend.async_clients.factory = lambda: async_client
+
+        async def collect():
+            return [c async for c in backend.generate_stream("hi")]
+
+        chunks = asyncio.run(collect())
+        assert "".join(c["text"] for c in chunks) == "Hello"
+        assert chunks[-1]["is_final"] and not backend.client.chat.completions.create.called
+
+
+class _StubTGIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.clients.add(self.client_address)
+        time.sleep(0.05)
+        with server.lock:
+            server.active -= 1
+        payload = json.dumps({"generated_text": body["inputs"].upper()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def tgi_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTGIHandler)
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    server.clients = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestAsyncGeneration:
+    def test_agenerate_caps_in_flight_and_reuses_connections(self, tgi_stub):
+        from src.llm.client import LLMClient
+        client = LLMClient(
+            backend="tgi",
+            model="llama",
+            endpoint=f"http://127.0.0.1:{tgi_stub.server_port}",
+            http={"max_connections": 8, "max_keepalive_connections": 8},
+            concurrency={"max_concurrency": 4},
+        )
+
+        async def run():
+            first = await asyncio.gather(*(client.agenerate(f"prompt {i}") for i in range(12)))
+            second = await asyncio.gather(*(client.agenerate(f"again {i}") for i in range(12)))
+            return first + second
+
+        results = asyncio.run(run())
+        client.cleanup()
+        assert [r["text"] for r in results[:2]] == ["PROMPT 0", "PROMPT 1"]
+        assert tgi_stub.peak <= 4
+        assert len(tgi_stub.clients) <= 4
+
+    def test_limiter_backs_off_on_rate_limits(self):
+        from src.llm.concurrency import AdaptiveConcurrencyLimiter, is_rate_limited
+        limiter = AdaptiveConcurrencyLimiter(max_concurrency=8, min_concurrency=2)
+
+        async def run():
+            slots = [await limiter.acquire() for _ in range(8)]
+            for started in slots[:4]:
+                limiter.release(started, throttled=True)
+            assert limiter.limit == 4
+            for started in slots[4:]:
+                limiter.release(started)
+            assert 4 < limiter.limit < 5
+            limiter.release(await limiter.acquire(), throttled=True)
+            assert 2 <= limiter.limit < 3
+            held = [await limiter.acquire(), await limiter.acquire()]
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            limiter.release(held[0])
+            await asyncio.wait_for(waiter, timeout=1)
+
+        asyncio.run(run())
+        assert is_rate_limited(Mock(status_code=429)) and not is_rate_limited(Mock(status_code=500, response=None))
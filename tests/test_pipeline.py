@@ -10,9 +10,189 @@ class TestBatchPipeline:
         pipeline = BatchPipeline(config_path="config.yaml")
         assert pipeline.transcriber is not None
 
+    @patch('src.pipeline.batch.WhisperTranscriber')
+    @patch('src.pipeline.batch.LLMClient')
+    def test_process_accepts_in_memory_audio(self, mock_llm, mock_transcriber):
+        import io
+        import wave
+        import numpy as np
+        from src.pipeline.batch import BatchPipeline
+        mock_transcriber.return_value.transcribe.return_value = {"text": "", "segments": [], "language": "en"}
+        pipeline = BatchPipeline(config_path="config.yaml")
+        pipeline.llm_client.agenerate = Mock(side_effect=Exception("offline"))
+        audio = np.zeros(16000, dtype=np.float32)
+        result = pipeline.process(audio)
+        assert result["metadata"]["source_file"] == "<memory>"
+        assert result["metadata"]["duration_seconds"] == 1.0
+        assert mock_transcriber.return_value.transcribe.call_args[0][0] is audio
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(np.zeros(8000, dtype=np.int16).tobytes())
+        result = pipeline.process(buffer.getvalue(), source_name="call.wav")
+        assert "error" not in result
+        assert result["metadata"]["source_file"] == "call.wav"
+        assert result["metadata"]["duration_seconds"] == 0.5
+
+    @patch('src.pipeline.batch.WhisperXRefiner')
+    @patch('src.pipeline.batch.SpeakerDiarizer')
+    @patch('src.pipeline.batch.WhisperTranscriber')
+    @patch('src.pipeline.batch.LLMClient')
+    def test_acoustic_diarization_replaces_llm_speaker_pass(self, mock_llm, mock_transcriber, mock_diarizer, mock_refiner, tmp_path):
+        import numpy as np
+        import yaml
+        from unittest.mock import AsyncMock
+        from src.diarization.diarizer import SpeakerDiarizer
+        from src.pipeline.batch import BatchPipeline
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(yaml.safe_dump({"diarization": {"speaker_identification_method": "acoustic", "align_words": True}}))
+        words = [{"word": " hi", "start": 0.1, "end": 0.4}, {"word": " yo", "start": 1.1, "end": 1.4}]
+        transcription = {"text": "hi yo", "language": "en", "words": words, "segments": [{"start": 0.0, "end": 0.5, "text": "hi"}, {"start": 1.0, "end": 1.5, "text": "yo"}]}
+        mock_transcriber.return_value.transcribe.return_value = transcription
+        mock_refiner.return_value.refine.side_effect = lambda audio, t: t
+        mock_diarizer.return_value.diarize.return_value = {"speakers": ["A", "B"], "segments": [{"start": 0.0, "end": 0.8, "speaker": "A"}, {"start": 0.9, "end": 2.0, "speaker": "B"}]}
+        mock_diarizer.return_value.assign_speakers_to_words.side_effect = lambda t, d: SpeakerDiarizer.assign_speakers_to_words(None, t, d)
+        pipeline = BatchPipeline(config_path=str(config_path))
+        pipeline.llm_client.agenerate = AsyncMock(side_effect=Exception("offline"))
+        audio = np.zeros(32000, dtype=np.float32)
+        result = pipeline.process(audio)
+        assert mock_diarizer.return_value.diarize.call_args[0][0] is audio
+        assert mock_refiner.return_value.refine.call_args[0][0] is audio
+        assert [seg["speaker"] for seg in result["transcript"]["segments"]] == ["A", "B"]
+        assert result["speaker_profiles"] == {"A": {"speaking_time": 0.8}, "B": {"speaking_time": 1.1}}
+        assert pipeline.llm_client.agenerate.await_count == 1
+
     def test_default_config(self):
         from src.pipeline.batch import BatchPipeline
         pipeline = BatchPipeline.__new__(BatchPipeline)
         config = pipeline._default_config()
         assert "asr" in config
         assert "llm" in config
+
+
+class TestWorkerPool:
+    @patch('src.pipeline.workers.ProcessPoolExecutor')
+    def test_bounded_queue_and_positions(self, mock_executor):
+        from concurrent.futures import Future
+        from src.pipeline.workers import WorkerPool, QueueFullError
+        mock_executor.return_value.submit.side_effect = lambda *args: Future()
+        pool = WorkerPool(num_workers=1, max_queue_size=2)
+        try:
+            done = []
+            assert pool.submit("a", "a.wav", on_done=lambda job_id, f: done.append(job_id)) == 1
+            assert pool.submit("b", "b.wav", on_done=lambda job_id, f: done.append(job_id)) == 2
+            assert pool.is_full()
+            with pytest.raises(QueueFullError) as exc:
+                pool.submit("c", "c.wav", on_done=lambda job_id, f: None)
+            assert exc.value.queue_position == 3
+            pool._mark_started("a")
+            assert pool.queue_position("a") == 0
+            assert pool.queue_position("b") == 1
+            pool.running["a"].set_result({})
+            assert done == ["a"]
+            assert pool.queue_position("a") is None
+            assert not pool.is_full()
+        finally:
+            pool.shutdown()
+
+
+class TestStageGraph:
+    def test_independent_stages_run_concurrently(self):
+        import asyncio
+        from src.pipeline.stages import run_stage_graph
+        events = []
+
+        def stage(name):
+            async def run(outputs):
+                events.append(f"start {name}")
+                await asyncio.sleep(0.01)
+                events.append(f"end {name}")
+                return name
+            return run
+
+        outputs = asyncio.run(run_stage_graph({"a": stage("a"), "b": stage("b")}, {}))
+        assert outputs == {"a": "a", "b": "b"}
+        assert events[:2] == ["start a", "start b"]
+
+    def test_dependencies_are_respected(self):
+        import asyncio
+        from src.pipeline.stages import run_stage_graph
+
+        async def speakers(outputs):
+            await asyncio.sleep(0.01)
+            return {"segments": []}
+
+        async def analysis(outputs):
+            return "with speakers" if "speakers" in outputs else "without speakers"
+
+        stages = {"analysis": analysis, "speakers": speakers}
+        assert asyncio.run(run_stage_graph(stages, {"analysis": ["speakers"]}))["analysis"] == "with speakers"
+        assert asyncio.run(run_stage_graph({"analysis": analysis}, {"analysis": ["speakers"]}))["analysis"] == "without speakers"
+
+    def test_cycle_rejected(self):
+        import asyncio
+        from src.pipeline.stages import run_stage_graph
+
+        async def noop(outputs):
+            return None
+
+        with pytest.raises(ValueError):
+            asyncio.run(run_stage_graph({"a": noop, "b": noop}, {"a": ["b"], "b": ["a"]}))
+
+
+class TestChunking:
+    def test_chunk_segments_with_overlap(self):
+        from src.pipeline.chunking import chunk_segments
+        segments = [{"start": i, "end": i + 1, "text": "x" * 40} for i in range(10)]
+        chunks = chunk_segments(segments, max_tokens=40, overlap_tokens=10)
+        assert all(sum(len(s["text"]) // 4 for s in chunk) <= 40 for chunk in chunks)
+        assert chunks[0][-1] is chunks[1][0]
+        assert chunks[-1][-1] is segments[-1]
+
+    def test_merge_speaker_results_reconciles_labels(self):
+        from src.pipeline.chunking import merge_speaker_results
+        first = {
+            "segments": [
+                {"start": 0.0, "end": 1.0, "speaker": "SPEAKER_01", "text": "hello"},
+                {"start": 1.0, "end": 2.0, "speaker": "SPEAKER_02", "text": "hi"},
+            ],
+            "speaker_profiles": {"SPEAKER_01": {"likely_role": "Sales Person"}, "SPEAKER_02": {"likely_role": "Customer"}},
+        }
+        second = {
+            "segments": [
+                {"start": 1.0, "end": 2.0, "speaker": "SPEAKER_01", "text": "hi"},
+                {"start": 2.0, "end": 3.0, "speaker": "SPEAKER_02", "text": "our offer"},
+            ],
+            "speaker_profiles": {"SPEAKER_01": {"likely_role": "Customer"}, "SPEAKER_02": {"likely_role": "Sales Person"}},
+        }
+        merged = merge_speaker_results([first, second])
+        assert [(s["start"], s["speaker"]) for s in merged["segments"]] == [(0.0, "SPEAKER_01"), (1.0, "SPEAKER_02"), (2.0, "SPEAKER_01")]
+        assert merged["speaker_profiles"]["SPEAKER_01"]["likely_role"] == "Sales Person"
+
+    def test_merge_analyses_dedups_items(self):
+        from src.pipeline.chunking import merge_analyses
+        merged = merge_analyses([
+            {"summary": "Part one.", "action_items": [{"item": "Send the quote", "confidence": 0.6}], "topics": ["pricing"], "sentiment": "positive"},
+            {"summary": "Part two.", "action_items": [{"item": "send the quote.", "confidence": 0.9}], "topics": ["Pricing", "support"], "sentiment": "positive"},
+        ])
+        assert merged["action_items"] == [{"item": "send the quote.", "confidence": 0.9}]
+        assert merged["topics"] == ["pricing", "support"]
+        assert merged["sentiment"] == "positive"
+        assert merged["summary"] == "Part one. Part two."
+
+
+class TestImportTime:
+    def test_pipeline_import_skips_heavy_backends(self):
+        import subprocess
+        import sys
+        from pathlib import Path
+        code = (
+            "import sys, time; start = time.perf_counter(); import src.pipeline.batch; "
+            "print(time.perf_counter() - start); "
+            "print(','.join(m for m in ['torch', 'faster_whisper', 'ctranslate2', 'groq', 'httpx', 'vllm'] if m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True).stdout.split("\n")
+        assert output[1] == ""
+        assert float(output[0]) < 2.0
@@ -0,0 +1,54 @@
+import time
+import pytest
+from src.storage.job_store import SQLiteJobStore, MemoryJobStore, create_job_store
+
+
+class TestSQLiteJobStore:
+    def test_job_lifecycle(self, tmp_path):
+        store = SQLiteJobStore(db_path=str(tmp_path / "jobs.db"), results_dir=str(tmp_path / "results"))
+        store.create("job-1", status="queued", progress=0, stage="Queued")
+        store.update("job-1", status="processing", progress=50, stage="Transcribing")
+        assert store.get("job-1") == {"job_id": "job-1", "status": "processing", "progress": 50, "stage": "Transcribing", "error": None}
+        store.set_result("job-1", {"summary": "hello", "transcript": {"text": "hi"}})
+        assert (tmp_path / "results" / "job-1.json.gz").exists()
+        store.result_cache.clear()
+        assert store.get_result("job-1") == {"summary": "hello", "transcript": {"text": "hi"}}
+        assert "job-1" in store.result_cache
+        store.close()
+
+    def test_persists_and_fails_incomplete_jobs(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(db_path=db_path, results_dir=str(tmp_path / "results"))
+        store.create("done", status="completed")
+        store.create("running", status="processing")
+        store.close()
+        reopened = SQLiteJobStore(db_path=db_path, results_dir=str(tmp_path / "results"))
+        assert reopened.fail_incomplete("restarted") == 1
+        assert reopened.get("running")["status"] == "failed"
+        assert reopened.get("done")["status"] == "completed"
+        reopened.close()
+
+    def test_evicts_expired_jobs(self, tmp_path):
+        store = SQLiteJobStore(db_path=str(tmp_path / "jobs.db"), results_dir=str(tmp_path / "results"), ttl_seconds=0.05)
+        store.create("old", status="completed")
+        store.set_result("old", {"summary": "x"})
+        time.sleep(0.1)
+        assert store.evict_expired() == 1
+        assert store.get("old") is None
+        assert store.get_result("old") is None
+        assert not (tmp_path / "results" / "old.json.gz").exists()
+        store.close()
+
+
+class TestJobStoreFactory:
+    def test_memory_store(self):
+        store = create_job_store({"store": "memory"})
+        assert isinstance(store, MemoryJobStore)
+        store.create("a", status="queued")
+        assert "a" in store
+        with pytest.raises(ValueError):
+            store.update("a", result={})
+
+    def test_unknown_store(self):
+        with pytest.raises(ValueError):
+            create_job_store({"store": "redis"})
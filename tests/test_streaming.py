@@ -0,0 +1,258 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from unittest.mock import Mock
+import numpy as np
+
+
+class TestHypothesisBuffer:
+    def test_local_agreement_commits_common_prefix(self):
+        from src.streaming.online_asr import HypothesisBuffer
+        buffer = HypothesisBuffer()
+        buffer.insert([(0.0, 0.4, " hello"), (0.5, 0.9, " world")])
+        assert buffer.flush() == []
+        buffer.insert([(0.0, 0.4, " Hello"), (0.5, 0.9, " word"), (1.0, 1.3, " again")])
+        assert [w[2] for w in buffer.flush()] == [" Hello"]
+        assert [w[2] for w in buffer.complete()] == [" word", " again"]
+
+    def test_skips_words_already_committed(self):
+        from src.streaming.online_asr import HypothesisBuffer
+        buffer = HypothesisBuffer()
+        buffer.insert([(0.0, 0.4, " one"), (0.5, 0.9, " two")])
+        buffer.flush()
+        buffer.insert([(0.0, 0.4, " one"), (0.5, 0.9, " two")])
+        buffer.flush()
+        buffer.insert([(0.8, 0.9, " two"), (1.0, 1.3, " three")])
+        assert [w[2] for w in buffer.new] == [" three"]
+
+
+class TestOnlineASRProcessor:
+    def test_commits_stable_words_and_trims_buffer(self):
+        from src.streaming.online_asr import OnlineASRProcessor
+        words = [{"start": 0.1, "end": 0.5, "word": " good"}, {"start": 0.6, "end": 1.0, "word": " morning"}]
+        transcriber = Mock()
+        transcriber.transcribe.return_value = {"words": words, "segments": [{"start": 0.1, "end": 1.0}]}
+        processor = OnlineASRProcessor(transcriber, buffer_trimming_seconds=1.0)
+        processor.insert_audio_chunk(np.zeros(16000, dtype=np.float32))
+        first = processor.process_iter()
+        assert first["committed"] == "" and first["partial"] == "good morning"
+        processor.insert_audio_chunk(np.zeros(16000, dtype=np.float32))
+        second = processor.process_iter()
+        assert second["committed"] == "good morning"
+        assert processor.buffer_time_offset == pytest.approx(1.0)
+        assert processor.buffer_seconds == pytest.approx(1.0)
+
+    def test_finish_flushes_partial(self):
+        from src.streaming.online_asr import OnlineASRProcessor
+        transcriber = Mock()
+        transcriber.transcribe.return_value = {"words": [{"start": 0.1, "end": 0.5, "word": " bye"}], "segments": []}
+        processor = OnlineASRProcessor(transcriber)
+        processor.insert_audio_chunk(np.zeros(8000, dtype=np.float32))
+        processor.process_iter()
+        final = processor.finish()
+        assert final["committed"] == "bye" and final["partial"] == ""
+        assert processor.buffer_time_offset == pytest.approx(0.5)
+
+    def test_pcm_ingest_is_capped_and_zero_copy(self):
+        from src.streaming.online_asr import OnlineASRProcessor
+        processor = OnlineASRProcessor(Mock(), sample_rate=100, buffer_trimming_seconds=1.0, max_buffer_seconds=2.0)
+        pcm = (np.arange(30, dtype=np.int16) * 1000).tobytes()
+        for i in range(0, len(pcm), 7):
+            processor.insert_pcm16(pcm[i:i + 7])
+        assert len(processor.audio_buffer) == 30
+        assert processor.audio_buffer[-1] == pytest.approx(29000 / 32768.0)
+        assert np.shares_memory(processor.audio_buffer, processor.buffer._data)
+        for _ in range(10):
+            processor.insert_pcm16(pcm)
+        assert processor.buffer_seconds == pytest.approx(2.0)
+        assert processor.buffer_time_offset == pytest.approx(1.3)
+
+
+class FakeWebSocket:
+    def __init__(self, messages, delay=0.0):
+        self.messages = messages
+        self.delay = delay
+        self.sent = []
+        self.ended = asyncio.Event()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message in self.messages:
+            await asyncio.sleep(self.delay)
+            yield message
+        await asyncio.wait_for(self.ended.wait(), timeout=5)
+
+    async def send(self, payload):
+        self.sent.append(json.loads(payload))
+        if self.sent[-1]["type"] == "stream_ended":
+            self.ended.set()
+
+
+def _streaming_llm(*tokens):
+    calls = []
+
+    async def generate_stream(prompt, **kwargs):
+        calls.append(prompt)
+        for token in tokens:
+            yield {"text": token, "tokens": 1, "is_final": False}
+
+    return Mock(generate_stream=generate_stream, calls=calls)
+
+
+class TestStreamingServer:
+    def test_asr_runs_off_event_loop(self):
+        from src.streaming.server import StreamingServer
+        server = StreamingServer(config_path="missing.yaml")
+        server.config = {"streaming": {"min_chunk_seconds": 0.5, "analysis_interval_seconds": 100}}
+        threads = []
+
+        def transcribe(audio, **kwargs):
+            threads.append(threading.current_thread().name)
+            return {"words": [{"start": 0.1, "end": 0.4, "word": " hi"}], "segments": []}
+
+        server.transcriber = Mock(transcribe=Mock(side_effect=transcribe))
+        server.llm_client = _streaming_llm("o", "k")
+        server.asr_executor = ThreadPoolExecutor(max_workers=2)
+        server.asr_semaphore = asyncio.Semaphore(2)
+        chunk = np.zeros(8000, dtype=np.int16).tobytes()
+        sockets = [FakeWebSocket([chunk, chunk, json.dumps({"type": "end_stream"})]) for _ in range(3)]
+
+        async def run():
+            await asyncio.gather(*(server._handle_connection(ws) for ws in sockets))
+
+        asyncio.run(run())
+        server.asr_executor.shutdown()
+        assert threads and threading.main_thread().name not in threads
+        for ws in sockets:
+            assert [m["type"] for m in ws.sent][-4:] == ["analysis_delta", "analysis_delta", "analysis", "stream_ended"]
+            assert ws.sent[-2]["analysis"] == "ok"
+            assert ws.sent[-1] == {"type": "stream_ended", "final_transcript": "hi"}
+        assert len(server.llm_client.calls) == 3
+        assert server.active_connections == {}
+
+    def test_vad_skips_silence_and_flushes_on_pause(self):
+        from src.streaming.server import StreamingServer
+        from src.streaming.vad import VoiceActivityDetector
+        server = StreamingServer(config_path="missing.yaml")
+        server.config = {"streaming": {"min_chunk_seconds": 1.0, "analysis_interval_seconds": 100}}
+        windows = []
+
+        def transcribe(audio, **kwargs):
+            windows.append(np.abs(audio).max())
+            return {"words": [{"start": 0.1, "end": 0.4, "word": " hi"}], "segments": []}
+
+        server.transcriber = Mock(transcribe=Mock(side_effect=transcribe))
+        server.llm_client = _streaming_llm("ok")
+        server.asr_executor = ThreadPoolExecutor(max_workers=1)
+        server.asr_semaphore = asyncio.Semaphore(1)
+        server.vad = VoiceActivityDetector(hangover_ms=240)
+        server.vad.use_webrtc = False
+        audio = np.zeros(16000 * 4, dtype=np.int16)
+        audio[32000:48000] = 16000
+        chunks = [audio[i:i + 4000].tobytes() for i in range(0, len(audio), 4000)]
+        ws = FakeWebSocket(chunks + [json.dumps({"type": "end_stream"})], delay=0.02)
+        asyncio.run(server._handle_connection(ws))
+        server.asr_executor.shutdown()
+        assert windows and min(windows) > 0
+        assert [m["type"] for m in ws.sent][:2] == ["partial", "transcription"]
+        assert ws.sent[-1]["final_transcript"] == "hi"
+
+
+    def test_analysis_coalesces_chunks_and_carries_state(self):
+        from src.streaming.analysis import RollingAnalysis
+        from src.streaming.server import StreamingServer
+        server = StreamingServer(config_path="missing.yaml")
+        server.config = {"streaming": {"stream_analysis": False}}
+        prompts = []
+        release = asyncio.Event()
+
+        async def agenerate(prompt, **kwargs):
+            prompts.append(prompt)
+            await release.wait()
+            return {"text": json.dumps({"updated_summary": f"summary {len(prompts)}", "new_insights": ["budget approved"], "new_action_items": []})}
+
+        server.llm_client = Mock(agenerate=agenerate)
+        conn = {"analysis": RollingAnalysis(), "analysis_id": 0, "analysis_queue": asyncio.Queue(), "outbox": asyncio.Queue(), "websocket": None}
+
+        async def run():
+            worker = asyncio.create_task(server._analysis_worker(conn))
+            for text in ["first chunk", "second chunk", "third chunk"]:
+                conn["analysis"].add(text)
+                conn["analysis_queue"].put_nowait(False)
+                await asyncio.sleep(0.01)
+            release.set()
+            await conn["analysis_queue"].join()
+            worker.cancel()
+
+        asyncio.run(run())
+        assert len(prompts) == 2
+        assert "second chunk third chunk" in prompts[1] and "first chunk" not in prompts[1]
+        assert "summary 1" in prompts[1] and "budget approved" in prompts[1]
+        assert conn["analysis"].snapshot() == {"summary": "summary 2", "insights": ["budget approved"], "action_items": []}
+
+class TestASRBatchScheduler:
+    def test_batches_windows_from_many_connections(self):
+        from src.streaming.scheduler import ASRBatchScheduler
+        transcriber = Mock()
+        transcriber.transcribe_batch.side_effect = lambda audios, batch_size: [{"text": str(len(a))} for a in audios]
+        scheduler = ASRBatchScheduler(transcriber, max_batch_size=4, max_wait_ms=20)
+
+        async def run():
+            results = await asyncio.gather(*(scheduler.submit(key, np.zeros(key + 1, dtype=np.float32)) for key in range(6)))
+            await scheduler.stop()
+            return results
+
+        results = asyncio.run(run())
+        assert [r["text"] for r in results] == ["1", "2", "3", "4", "5", "6"]
+        assert [len(call.args[0]) for call in transcriber.transcribe_batch.call_args_list] == [4, 2]
+
+    def test_caps_windows_per_connection(self):
+        from src.streaming.scheduler import ASRBatchScheduler
+        scheduler = ASRBatchScheduler(Mock(), max_batch_size=4, max_windows_per_connection=1)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            for key in ["a", "a", "b"]:
+                scheduler.pending.append((key, np.zeros(1), loop.create_future()))
+            return scheduler._take_batch()
+
+        batch = asyncio.run(run())
+        assert [item[0] for item in batch] == ["a", "b"]
+        assert [item[0] for item in scheduler.pending] == ["a"]
+
+
+def _rounded(segments):
+    return [(round(s["start"], 2), round(s["end"], 2)) for s in segments]
+
+
+class TestVoiceActivityDetector:
+    def _audio(self):
+        audio = np.zeros(16000 * 3, dtype=np.float32)
+        audio[4800:16000] = 0.5
+        audio[32000:40000] = 0.5
+        return audio
+
+    def test_vectorized_segments(self):
+        from src.streaming.vad import VoiceActivityDetector
+        vad = VoiceActivityDetector(hangover_ms=0)
+        vad.use_webrtc = False
+        assert _rounded(vad.process_audio(self._audio())) == [(0.3, 1.02), (1.98, 2.52)]
+        vad.hangover_frames = 3
+        assert _rounded(vad.process_audio(self._audio())) == [(0.3, 1.11), (1.98, 2.61)]
+
+    def test_streaming_matches_one_shot(self):
+        from src.streaming.vad import VoiceActivityDetector, StreamingVAD
+        vad = VoiceActivityDetector(hangover_ms=90)
+        vad.use_webrtc = False
+        audio = self._audio()
+        streaming = StreamingVAD(vad)
+        segments = []
+        for start in range(0, len(audio), 1234):
+            segments.extend(streaming.process(audio[start:start + 1234]))
+        segments.extend(streaming.flush())
+        assert _rounded(segments) == _rounded(vad.process_audio(audio))
+        assert streaming.silence_seconds == pytest.approx(3.0 - 2.61)